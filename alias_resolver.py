@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alias Resolver
+Fuzzy resolution of unmapped team names through a character n-gram index
+"""
+
+import json
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+PUNCTUATION = re.compile(r"[.'`()]")
+# Short campus or state qualifiers: "St. Francis-NY", "Saint Joseph's-Pa.", "Miami (FL)", "Miami OH"
+QUALIFIER = re.compile(r"\(([A-Za-z. ]{1,6})\)|-([A-Za-z.]{1,5})$|\s([A-Z]{2})$")
+
+
+def normalize(name: str) -> str:
+    """Lowercase a name and drop punctuation that varies between sources."""
+    return ' '.join(PUNCTUATION.sub('', name).lower().replace('-', ' ').split())
+
+
+def qualifiers(name: str) -> FrozenSet[str]:
+    """Normalized qualifiers in a name, e.g. {'ny'} for 'St. Francis-NY'."""
+    found = set()
+    for groups in QUALIFIER.findall(name):
+        qualifier = normalize(next(group for group in groups if group)).replace(' ', '')
+        if 0 < len(qualifier) <= 4:
+            found.add(qualifier)
+    return frozenset(found)
+
+
+def _same_place(qualified: Iterable[str], known: Iterable[str]) -> bool:
+    # Sources abbreviate the same place to different lengths ('ca', 'cal'), so a prefix counts as a match
+    return any(a.startswith(b) or b.startswith(a) for a in qualified for b in known)
+
+
+def ngrams(text: str, n: int = 3) -> Set[str]:
+    """Character n-grams of a name, padded so word boundaries count."""
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class FuzzyAliasResolver:
+    def __init__(self, aliases: Dict[str, str], threshold: float = 0.8,
+                 cache_path: Optional[str] = None, n: int = 3, margin: float = 0.1):
+        """
+        Args:
+            aliases (dict): Known alias to canonical name; canonical names
+                themselves are indexed too
+            threshold (float): Minimum Dice similarity for a resolution to be used
+            cache_path (str): JSON file that memoizes accepted resolutions
+            n (int): Character n-gram length
+            margin (float): How far the best team must score above the
+                runner-up, so near-ties between similar names stay unresolved
+        """
+        self.threshold = threshold
+        self.margin = margin
+        self.cache_path = cache_path
+        self.n = n
+        self.canonical_names = set(aliases.values())
+
+        # Inverted index: n-gram -> ids of indexed strings containing it
+        self._targets: List[str] = []
+        self._sizes: List[int] = []
+        self._index: Dict[str, List[int]] = defaultdict(list)
+        # Qualifiers each team is known by; a qualified name must carry one of them
+        self._qualifiers: Dict[str, Set[str]] = defaultdict(set)
+        seen = set()
+        for alias, canonical in list(aliases.items()) + [(c, c) for c in self.canonical_names]:
+            self._qualifiers[canonical] |= qualifiers(alias)
+            key = normalize(alias)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            grams = ngrams(key, n)
+            target_id = len(self._targets)
+            self._targets.append(canonical)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._index[gram].append(target_id)
+
+        self._lock = threading.Lock()
+        self._misses: Set[str] = set()
+        self._resolved: Dict[str, Tuple[str, float, float]] = self._load_cache()
+
+    def _load_cache(self) -> Dict[str, Tuple[str, float, float]]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                # Entries without a margin predate the runner-up and qualifier checks; resolve them again
+                return {name: (entry['team'], entry['score'], entry['margin'])
+                        for name, entry in json.load(f).items() if 'margin' in entry}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable alias cache {self.cache_path}: {e}")
+            return {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entries = {name: {'team': team, 'score': round(score, 3), 'margin': round(margin, 3)}
+                   for name, (team, score, margin) in sorted(self._resolved.items())}
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    def _candidates(self, name: str) -> List[Tuple[float, str]]:
+        """
+        (Dice similarity, canonical name) of the two best-scoring teams, best first.
+
+        Only indexed strings sharing at least one n-gram with the name are
+        scored, so the cost follows the posting lists rather than the size
+        of the alias table. A name with a qualifier never matches a team
+        known by other qualifiers, however similar the rest of it is.
+        """
+        grams = ngrams(normalize(name), self.n)
+        if not grams:
+            return []
+
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._index.get(gram, ()))
+
+        qualified = qualifiers(name)
+        best: Dict[str, float] = {}
+        for target_id, overlap in shared.items():
+            team = self._targets[target_id]
+            known = self._qualifiers[team]
+            if qualified and known and not _same_place(qualified, known):
+                continue
+            score = 2 * overlap / (len(grams) + self._sizes[target_id])
+            if score > best.get(team, 0.0):
+                best[team] = score
+        return sorted(((score, team) for team, score in best.items()), reverse=True)[:2]
+
+    def best_match(self, name: str) -> Tuple[Optional[str], float]:
+        """Return the closest canonical name and its Dice similarity."""
+        candidates = self._candidates(name)
+        if not candidates:
+            return None, 0.0
+        score, team = candidates[0]
+        return team, score
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Return the canonical name for an unmapped name, or None below the threshold."""
+        return self.resolve_many([name]).get(name)
+
+    def resolve_many(self, names: Iterable[str], present: Iterable[str] = ()) -> Dict[str, str]:
+        """
+        Resolve several names, writing the alias cache at most once.
+
+        Args:
+            names (iterable): Names missing from the direct mappings
+            present (iterable): Canonical teams already in the same frame.
+                A name resolving onto one of them is a different team with
+                a similar name, so it is left unresolved; so are names that
+                resolve onto the same team as each other.
+        """
+        names = list(names)
+        taken = set(present) | {name for name in names if name in self.canonical_names}
+        resolutions = {}
+        fuzzy: Dict[str, List[str]] = defaultdict(list)
+        new_entries = False
+        for name in names:
+            if name in self.canonical_names:
+                resolutions[name] = name
+                continue
+            with self._lock:
+                cached = self._resolved.get(name)
+                missed = name in self._misses
+            if cached is not None:
+                fuzzy[cached[0]].append(name)
+                continue
+            if missed:
+                continue
+            candidates = self._candidates(name)
+            score, team = candidates[0] if candidates else (0.0, None)
+            margin = score - (candidates[1][0] if len(candidates) > 1 else 0.0)
+            with self._lock:
+                if team is None or score < self.threshold or margin < self.margin:
+                    self._misses.add(name)
+                    continue
+                self._resolved[name] = (team, score, margin)
+            fuzzy[team].append(name)
+            new_entries = True
+        if new_entries:
+            with self._lock:
+                self._save_cache()
+        for team, matched in fuzzy.items():
+            if team not in taken and len(matched) == 1:
+                resolutions[matched[0]] = team
+        return resolutions
@@ -1,11 +1,206 @@
-from flask import Flask, render_template, request
+import os
+import json
+import time
+from contextlib import ExitStack
+from typing import Optional, Tuple
+from flask import Flask, g, render_template, request
 import pandas as pd
 from main import BasketballRankingsParser
+from combine import TeamDimension, combine_rankings
+from snapshot_cache import SnapshotCache
+from page_cache import PageCache
+from shared_snapshot import SharedSnapshot, COMBINED
+from refresh_scheduler import RefreshScheduler
+from rankings_db import RankingsDB, CONFERENCE_COLUMN
+from frame_query import FrameQuery, QueryError
+from schema import rank_column
+from metrics import REGISTRY, REQUEST_SECONDS, RESPONSES, gauge_lines, stage
+from profiling import Profiler
 
 app = Flask(__name__)
 
 
 parser = BasketballRankingsParser()
+# Integer team IDs shared by every combine in this process
+team_dimension = TeamDimension()
+
+# Serve page views from in-memory snapshots instead of scraping on every hit
+cache = SnapshotCache(
+    ttl=float(os.environ.get('RANKINGS_CACHE_TTL', 900)),
+    max_stale=float(os.environ.get('RANKINGS_CACHE_MAX_STALE', 86400))
+)
+
+# Seconds the combined page waits for sources before merging what it has
+COMBINED_DEADLINE = float(os.environ.get('RANKINGS_COMBINED_DEADLINE', 20))
+# Seconds a combined table missing a source is served before it is rebuilt in the background
+PARTIAL_TTL = float(os.environ.get('RANKINGS_PARTIAL_TTL', 30))
+
+# Rendered, compressed pages per snapshot version; shared caches may reuse them this long
+pages = PageCache(max_pages=int(os.environ.get('RANKINGS_PAGE_CACHE_SIZE', 256)))
+PAGE_MAX_AGE = int(os.environ.get('RANKINGS_PAGE_MAX_AGE', 60))
+
+# RANKINGS_PROFILE_REQUESTS=1 lets a request add ?profile=1 to save a cProfile capture of
+# itself under results/profiles; off by default since anyone could otherwise trigger it
+PROFILE_REQUESTS = os.environ.get('RANKINGS_PROFILE_REQUESTS') == '1'
+
+# Written by the pipeline (main.py); pages read from it instead of the network
+db = RankingsDB()
+
+# RANKINGS_SERVE_MODE=shared (set by wsgi.py) serves only the snapshot the pipeline
+# publishes; every worker maps the same files and none of them scrapes
+SERVE_MODE = os.environ.get('RANKINGS_SERVE_MODE', 'live')
+shared = SharedSnapshot() if SERVE_MODE == 'shared' else None
+
+SOURCES = {
+    "kenpom": parser.get_kenpom_rankings,
+    "ncaa": parser.get_ncaa_rankings,
+    "rpi": parser.get_rpi_rankings,
+    "sos": parser.get_sos_rankings,
+    "espn": parser.get_espn_rankings
+}
+
+def load_source_rankings(source: str) -> pd.DataFrame:
+    """Load a source's newest stored snapshot, scraping only if it has never been stored."""
+    df = db.latest(source)
+    if df is None:
+        # With the scheduler running, requests never scrape; its first refresh fills this in
+        df = SOURCES[source]() if scheduler is None else pd.DataFrame()
+    return df
+
+def publish_refresh(source: str, df: pd.DataFrame):
+    """Store a scheduled refresh and swap it into the cache."""
+    db.write_snapshot(source, df)
+    cache.set(source, df)
+    cache.invalidate("combined")
+
+# RANKINGS_SCHEDULER=1 refreshes every source in the background on its own cadence
+# (live mode only; production runs refresh_scheduler.py as its own process)
+scheduler = None
+if shared is None and os.environ.get('RANKINGS_SCHEDULER') == '1':
+    scheduler = RefreshScheduler(SOURCES, publish_refresh).start()
+
+def source_snapshot(source: str) -> Tuple[object, pd.DataFrame]:
+    """Return (data version, rankings) for a source."""
+    if shared is not None:
+        version, df = shared.get(source)
+        return version, df if df is not None else pd.DataFrame()
+    snapshot = cache.get_snapshot(source, lambda: load_source_rankings(source))
+    return snapshot.version, snapshot.value
+
+def get_source_rankings(source: str) -> pd.DataFrame:
+    """Return the cached rankings for a source, loading only on a miss."""
+    return source_snapshot(source)[1]
+
+def build_combined_rankings():
+    """
+    Fetch every source concurrently and merge whatever finishes in time.
+
+    Returns:
+        tuple: (combined DataFrame, list of sources left out)
+    """
+    fetchers = {source: (lambda source=source: get_source_rankings(source)) for source in SOURCES}
+    results = parser.fetch_all_rankings(fetchers, timeout=COMBINED_DEADLINE)
+
+    frames = {source: df for source, df in results.items() if not df.empty}
+    missing = [source for source in SOURCES if source not in frames]
+    with stage("combine", "combined"):
+        return combine_rankings(frames, dimension=team_dimension), missing
+
+def combined_snapshot():
+    """Return (data version, (combined DataFrame, list of sources left out))."""
+    if shared is not None:
+        version, df = shared.get(COMBINED)
+        published = shared.manifest(version)["sources"] if version is not None else []
+        if df is None:
+            df = pd.DataFrame(columns=["Team"])
+        return version, (df, [source for source in SOURCES if source not in published])
+
+    # A partial table goes stale quickly, so views keep getting it at once while a
+    # background rebuild retries the missing sources (slow ones keep loading into the cache)
+    snapshot = cache.get_snapshot("combined", build_combined_rankings,
+                                  ttl_for=lambda value: PARTIAL_TTL if value[1] else None)
+    return snapshot.version, snapshot.value
+
+def render_table(df: pd.DataFrame, source: str) -> str:
+    """Render a rankings frame as an HTML table."""
+    # Ratings are float32; '{:g}' prints them as parsed rather than with float noise
+    with stage("render", source):
+        return df.to_html(classes='data-table', index=False, float_format='{:g}'.format)
+
+def serve_page(key, version, render):
+    """
+    Serve a page rendered once per data version.
+
+    Repeat requests are a dictionary lookup; clients and proxies holding
+    the current ETag of the negotiated encoding get 304 Not Modified
+    without a body.
+    """
+    page = pages.get(key, version, render)
+    body, encoding = page.negotiate(
+        encoding for encoding, quality in request.accept_encodings if quality > 0
+    )
+    etag = page.etag_for(encoding)
+    # If-None-Match uses weak comparison, so tags a proxy weakened (W/"...") still match
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={PAGE_MAX_AGE}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def cache_metrics():
+    """Cache counters kept by the caches themselves, for /metrics."""
+    stats = cache.stats()
+    return gauge_lines(
+        "rankings_snapshot_cache_requests_total", "Snapshot cache lookups by result", "counter",
+        {(("result", "hit"),): stats['hits'], (("result", "stale"),): stats['stale_hits'],
+         (("result", "miss"),): stats['misses']}
+    ) + gauge_lines(
+        "rankings_snapshot_cache_refresh_errors_total", "Background refreshes that failed", "counter",
+        {(): stats['refresh_errors']}
+    ) + gauge_lines(
+        "rankings_page_renders_total", "Pages rendered; every other page view was a cache hit", "counter",
+        {(): pages.renders}
+    )
+
+REGISTRY.register_collector(cache_metrics)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if PROFILE_REQUESTS and request.args.get('profile') == '1':
+        endpoint = request.endpoint or "unmatched"
+        profiler = Profiler(run=f"request-{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}")
+        g.profile_path = profiler.artifact(endpoint, "request")
+        g.profile = ExitStack()
+        g.profile.enter_context(profiler.profile(endpoint, "request"))
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or "unmatched"
+    REQUEST_SECONDS.observe(time.perf_counter() - g.get('request_start', time.perf_counter()), endpoint=endpoint)
+    RESPONSES.inc(endpoint=endpoint, status=response.status_code)
+    if 'profile_path' in g:
+        response.headers['X-Profile'] = g.profile_path
+    return response
+
+@app.teardown_request
+def stop_request_profile(exc=None):
+    # Runs even when the view raised, so the profiler is always switched off
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.close()
+
+@app.route('/metrics')
+def metrics():
+    """Stage timings, payload sizes, cache hits and failures in the Prometheus text format."""
+    # Each gunicorn worker keeps its own counts, so a scrape reports the worker that answered it.
+    # Workers in shared mode never scrape; refresh_scheduler.py serves the stage timings
+    return app.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
@@ -15,36 +210,92 @@ def index():
 @app.route('/rankings/<source>')
 def rankings(source):
     """Fetch rankings from a specific source and display as a table."""
-    if source == "kenpom":
-        df = parser.get_kenpom_rankings()
-    elif source == "ncaa":
-        df = parser.get_ncaa_rankings()
-    elif source == "rpi":
-        df = parser.get_rpi_rankings()
-    elif source == "sos":
-        df = parser.get_sos_rankings()
-    elif source == "espn":
-        df = parser.get_espn_rankings()
-    else:
+    if source not in SOURCES:
         return render_template('error.html', message="Invalid source"), 400
-    
-    return render_template('table.html', table=df.to_html(classes='data-table', index=False), title=f"{source.upper()} Rankings")
+
+    version, df = source_snapshot(source)
+    return serve_page(("rankings", source), version, lambda: render_template(
+        'table.html', table=render_table(df, source), title=f"{source.upper()} Rankings"))
 
 @app.route('/combined')
 def combined_rankings():
     """Combine rankings and display as a table."""
-    kenpom_df = parser.get_kenpom_rankings()
-    ncaa_df = parser.get_ncaa_rankings()
-    rpi_df = parser.get_rpi_rankings()
-    sos_df = parser.get_sos_rankings()
-    espn_df = parser.get_espn_rankings()
-    
-    dfs = [kenpom_df, ncaa_df, rpi_df, sos_df, espn_df]
-    combined_df = dfs[0]
-    for df in dfs[1:]:
-        combined_df = pd.merge(combined_df, df, on="Team", how="inner")
-    
-    return render_template('table.html', table=combined_df.to_html(classes='data-table', index=False), title="Combined Rankings")
+    version, (combined_df, missing) = combined_snapshot()
+    return serve_page(("combined",), version, lambda: render_template(
+        'table.html', table=render_table(combined_df, "combined"), title="Combined Rankings", missing=missing))
+
+@app.route('/team/<team>')
+def team_rankings(team):
+    """Show how a team's row in one source changed across stored snapshots."""
+    source = request.args.get('source', 'kenpom')
+    if source not in SOURCES:
+        return render_template('error.html', message="Invalid source"), 400
+
+    snapshot = db.latest_snapshot(source)
+    return serve_page(("team", team, source), snapshot and snapshot[0], lambda: render_template(
+        'table.html', table=render_table(db.team_history(team, source), source),
+        title=f"{team} - {source.upper()} History"))
+
+@app.route('/conference/<conference>')
+def conference_rankings(conference):
+    """Show one conference's teams from a source's newest stored snapshot."""
+    source = request.args.get('source', 'kenpom')
+    if source not in SOURCES:
+        return render_template('error.html', message="Invalid source"), 400
+
+    snapshot = db.latest_snapshot(source)
+    return serve_page(("conference", conference, source), snapshot and snapshot[0], lambda: render_template(
+        'table.html', table=render_table(db.conference(conference, source), source),
+        title=f"{conference} - {source.upper()} Rankings"))
+
+def team_conferences(df: pd.DataFrame) -> Optional[pd.Series]:
+    """Conference of each row, taken from KenPom when the frame has no conference column."""
+    if CONFERENCE_COLUMN in df.columns:
+        return df[CONFERENCE_COLUMN]
+    if "Team" not in df.columns:
+        return None
+    kenpom = get_source_rankings("kenpom")
+    if CONFERENCE_COLUMN not in kenpom.columns:
+        return None
+    lookup = kenpom.drop_duplicates("Team").set_index("Team")[CONFERENCE_COLUMN]
+    return df["Team"].map(lookup)
+
+def api_response(df: pd.DataFrame, default_rank: Optional[str], **extra):
+    """Apply the request's query to a cached frame and return the page as JSON."""
+    try:
+        query = FrameQuery.from_args(request.args, rank_column=default_rank)
+        conferences = team_conferences(df) if query.conferences is not None else None
+        page, total = query.apply(df, conferences)
+    except QueryError as e:
+        return app.response_class(json.dumps({"error": str(e)}), status=400, mimetype='application/json')
+
+    # Only the requested page is serialized; to_json writes missing values as null.
+    # Ratings are float32: widen through their shortest repr so JSON shows them as parsed
+    ratings = [column for column, dtype in page.dtypes.items() if dtype == 'float32']
+    if ratings:
+        page = page.assign(**{column: page[column].astype(str).astype('float64') for column in ratings})
+    header = json.dumps(dict(extra, total=total, offset=query.offset, limit=query.limit,
+                             columns=list(page.columns)))
+    body = f'{header[:-1]}, "rows": {page.to_json(orient="records")}}}'
+    return app.response_class(body, mimetype='application/json')
+
+@app.route('/api/rankings/<source>')
+def api_rankings(source):
+    """JSON rankings for one source."""
+    if source not in SOURCES:
+        return app.response_class(json.dumps({"error": "Invalid source"}), status=400,
+                                  mimetype='application/json')
+    return api_response(get_source_rankings(source), rank_column(source), source=source)
+
+@app.route('/api/combined')
+def api_combined():
+    """JSON combined rankings."""
+    _, (combined_df, missing) = combined_snapshot()
+    # The first source with a rank column orders the combined table
+    default_rank = next((rank_column(source) for source in SOURCES
+                         if rank_column(source) in combined_df.columns), None)
+    return api_response(combined_df, default_rank, missing=missing)
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Development server only; run production through gunicorn (see gunicorn.conf.py)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Async Fetch Engine
+asyncio-based page fetching with per-host concurrency limits and timeouts
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:  # Fall back to the shared blocking session on a bounded thread pool
+    aiohttp = None
+
+from http_session import get_session
+from fetch_policy import RETRY_STATUSES, BudgetExceededError, get_policy
+from rate_limit import MAX_THROTTLED_RETRIES, get_rate_limiter
+from cassette import get_cassette
+
+
+@dataclass
+class FetchJob:
+    key: str
+    url: str
+    params: Optional[Dict[str, str]] = None
+    # Source whose policy the job runs under; jobs without one share their host's
+    source: Optional[str] = None
+
+
+@dataclass
+class FetchResult:
+    key: str
+    url: str
+    status: Optional[int] = None
+    text: Optional[str] = None
+    error: Optional[Exception] = None
+    elapsed: float = 0.0
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and self.status < 400
+
+
+class AsyncFetchEngine:
+    def __init__(self, per_host_limit: int = 4, total_limit: int = 64,
+                 timeout: float = 30, headers: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            per_host_limit (int): Maximum in-flight requests per host
+            total_limit (int): Maximum in-flight requests overall
+            timeout (float): Longest single attempt in seconds
+            headers (dict): Headers sent with every request
+        """
+        self.per_host_limit = per_host_limit
+        self.total_limit = total_limit
+        self.timeout = timeout
+        self.headers = headers or {'User-Agent': 'Mozilla/5.0'}
+
+    async def fetch_iter(self, jobs: Iterable[FetchJob]) -> AsyncIterator[FetchResult]:
+        """
+        Fetch every job concurrently, yielding results as each one completes.
+
+        Failures and timeouts are yielded as results with ``error`` set
+        rather than raised. Closing the iterator early cancels whatever is
+        still in flight.
+        """
+        host_limits: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+        total_limit = asyncio.Semaphore(self.total_limit)
+
+        session = None
+        # Recording and replay happen in the shared client, so use it whenever a cassette is active
+        if aiohttp is not None and get_cassette() is None:
+            connector = aiohttp.TCPConnector(limit=self.total_limit, limit_per_host=self.per_host_limit)
+            session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+
+        async def run(job: FetchJob) -> FetchResult:
+            async with total_limit, host_limits[urlsplit(job.url).netloc]:
+                start = time.perf_counter()
+                try:
+                    # Bounded by the source's policy and budget, rate-limit queueing included
+                    result = await self._fetch(session, job)
+                except Exception as e:
+                    result = FetchResult(job.key, job.url, error=e)
+                result.elapsed = time.perf_counter() - start
+                return result
+
+        tasks = [asyncio.ensure_future(run(job)) for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if session is not None:
+                await session.close()
+
+    async def _fetch(self, session, job: FetchJob) -> FetchResult:
+        # One policy per source (or host), never per job, so a backfill of many pages
+        # shares one breaker and budget rather than creating a policy for each
+        policy = get_policy(job.source or urlsplit(job.url).hostname)
+        if session is None:
+            response = await asyncio.to_thread(
+                get_session().get, job.url, params=job.params, headers=self.headers, policy=policy
+            )
+            return FetchResult(job.key, job.url, response.status_code, response.text, headers=dict(response.headers))
+
+        policy.breaker.before_call()
+        limiter = get_rate_limiter()
+        deadline = policy.deadline()
+        attempt = throttled = 0
+        while True:
+            # Queue for the host's next slot, shared with the blocking client;
+            # queueing and Retry-After pauses count against the source's budget
+            try:
+                await limiter.wait_async(job.url, deadline)
+            except BudgetExceededError:
+                policy.breaker.record_failure()
+                raise
+            connect, read = policy.timeout(deadline)
+            error = None
+            try:
+                timeout = aiohttp.ClientTimeout(total=self.timeout, sock_connect=connect, sock_read=read)
+                async with session.get(job.url, params=job.params, timeout=timeout) as response:
+                    result = FetchResult(job.key, job.url, response.status, await response.text(),
+                                         headers=dict(response.headers))
+                if result.status == 429 and throttled < MAX_THROTTLED_RETRIES:
+                    # Throttled requests wait and go again without using up a retry
+                    throttled += 1
+                    limiter.throttle(job.url, result.headers.get('Retry-After'))
+                    continue
+                if result.status not in RETRY_STATUSES:
+                    break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+
+            delay = policy.retry_delay(attempt)
+            if attempt >= policy.retries or time.monotonic() + delay >= deadline:
+                policy.breaker.record_failure()
+                if error is not None:
+                    raise error
+                return result
+            attempt += 1
+            await asyncio.sleep(delay)
+
+        if result.ok:
+            policy.breaker.record_success()
+        else:
+            policy.breaker.record_failure()
+        return result
+
+    async def fetch_all(self, jobs: Iterable[FetchJob]) -> Dict[str, FetchResult]:
+        """Fetch every job and return the results keyed by job key."""
+        return {result.key: result async for result in self.fetch_iter(jobs)}
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parser Benchmarks
+Times every parser, name standardization and the combine step over the
+recorded pages in benchmarks/fixtures, with no network involved.
+
+Run from the repository root:
+    python benchmarks/bench_parsers.py                  # compare against baseline.json
+    python benchmarks/bench_parsers.py --save-baseline  # record a new baseline
+Exits with status 1 when a benchmark is slower or uses more memory than the
+baseline allows.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+sys.path.insert(0, ROOT)
+# Keep fuzzy-match resolutions made while benchmarking out of results/
+os.environ.setdefault('TEAM_ALIAS_CACHE', os.path.join(tempfile.mkdtemp(), 'alias_cache.json'))
+
+import pandas as pd  # noqa: E402
+from main import BasketballRankingsParser  # noqa: E402
+from sagarin import BasketballRankingsParser as SagarinParser  # noqa: E402
+from combine import combine_rankings  # noqa: E402
+from html_tables import BACKENDS, default_backend  # noqa: E402
+
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def benchmarks(parser: BasketballRankingsParser) -> Dict[str, Callable[[], pd.DataFrame]]:
+    """Name to a zero-argument callable returning the frame it produced."""
+    pages = {source: fixture(f"{source}.html") for source in ("kenpom", "ncaa", "rpi", "sos", "espn")}
+    espn_pages = json.loads(fixture("espn_api.json"))
+    sagarin_lines = fixture("sagarin.html").splitlines()
+    sagarin = SagarinParser()
+
+    cases = {
+        f"parse_{source}": (lambda source=source: getattr(parser, f"parse_{source}_rankings")(pages[source]))
+        for source in ("kenpom", "ncaa", "rpi", "sos")
+    }
+    cases["parse_espn_page"] = lambda: parser.parse_espn_page(pages["espn"])
+    cases["parse_espn_api"] = lambda: parser.parse_espn_api_pages(espn_pages)
+    cases["parse_sagarin"] = lambda: sagarin.parse_lines(sagarin_lines)
+
+    # Raw team names as every source spells them
+    frames = {name: cases[f"parse_{name}"]() for name in ("kenpom", "ncaa", "rpi", "sos")}
+    frames["espn"] = cases["parse_espn_api"]()
+    raw_names = pd.concat([
+        pd.read_csv(os.path.join(ROOT, "results", f"{source}.csv"), usecols=["Team"])["Team"]
+        for source in ("kenpom", "ncaa", "rpi", "sos", "espn", "sagarin")
+    ], ignore_index=True)
+    cases["standardize"] = lambda: pd.DataFrame({"Team": parser.standardize_team_names(raw_names)})
+    cases["combine"] = lambda: combine_rankings(frames)
+    return cases
+
+
+def measure(fn: Callable[[], pd.DataFrame], repeat: int) -> Dict[str, float]:
+    fn()  # warm caches the way a long-running process would
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = fn()
+        times.append(time.perf_counter() - start)
+
+    # Traced separately; tracemalloc slows the timed runs down
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(times)
+    rows = len(df) if df is not None else 0
+    return {
+        "rows": rows,
+        "median_s": median,
+        "min_s": min(times),
+        "rows_per_sec": rows / median if median else 0.0,
+        "peak_kib": peak / 1024
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Return a message per benchmark that regressed past the tolerance."""
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["rows"] != base["rows"]:
+            failures.append(f"{name}: produced {result['rows']} rows, baseline {base['rows']}")
+        for key, label in (("median_s", "time"), ("peak_kib", "peak memory")):
+            if result[key] > base[key] * (1 + tolerance):
+                failures.append(f"{name}: {label} {result[key] / base[key]:.2f}x baseline")
+    return failures
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    args.add_argument("--repeat", type=int, default=20, help="timed runs per benchmark")
+    args.add_argument("--backend", choices=BACKENDS, default=None, help="HTML parsing backend")
+    args.add_argument("--only", nargs="*", help="benchmark names to run")
+    args.add_argument("--baseline", default=BASELINE, help="baseline JSON to compare against or write")
+    args.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    args.add_argument("--tolerance", type=float, default=0.5,
+                      help="allowed slowdown or memory growth, as a fraction of the baseline")
+    options = args.parse_args()
+
+    parser = BasketballRankingsParser()
+    parser.html_backend = options.backend or default_backend()
+    cases = benchmarks(parser)
+    if options.only:
+        cases = {name: fn for name, fn in cases.items() if name in options.only}
+
+    results = {}
+    print(f"{'benchmark':<18}{'rows':>6}{'median ms':>11}{'min ms':>9}{'rows/s':>11}{'peak KiB':>10}")
+    for name, fn in cases.items():
+        result = results[name] = measure(fn, options.repeat)
+        print(f"{name:<18}{result['rows']:>6}{result['median_s'] * 1000:>11.2f}{result['min_s'] * 1000:>9.2f}"
+              f"{result['rows_per_sec']:>11,.0f}{result['peak_kib']:>10,.0f}")
+
+    if options.save_baseline:
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "environment": {
+                    "python": platform.python_version(),
+                    "pandas": pd.__version__,
+                    "machine": platform.machine(),
+                    "backend": parser.html_backend
+                },
+                "results": results
+            }, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {options.baseline}")
+        return
+
+    if not os.path.exists(options.baseline):
+        print(f"\nNo baseline at {options.baseline}; run with --save-baseline to record one")
+        return
+    with open(options.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["environment"].get("backend") != parser.html_backend:
+        print(f"\nNote: baseline used the {baseline['environment'].get('backend')} backend")
+    failures = compare(results, baseline["results"], options.tolerance)
+    if failures:
+        print("\nRegressions against the baseline:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
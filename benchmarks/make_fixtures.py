@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark Fixtures
+Rebuilds the recorded source pages in benchmarks/fixtures from the CSVs in results/
+
+Each page reproduces the layout its parser reads (column positions, record
+suffixes, the two-table ESPN page, Sagarin's preformatted text) inside
+enough surrounding markup to cost what the live page costs to parse.
+Run from the repository root: python benchmarks/make_fixtures.py
+"""
+
+import html
+import json
+import os
+import random
+import pandas as pd
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESULTS = "results"
+
+
+def read(source: str) -> pd.DataFrame:
+    return pd.read_csv(os.path.join(RESULTS, f"{source}.csv"), dtype=str, keep_default_na=False)
+
+
+def page(title: str, tables: str) -> str:
+    """Wrap tables in the navigation, scripts and ads a real page carries."""
+    nav = "".join(f'<li class="nav-item"><a href="/section/{i}">Section {i}</a></li>' for i in range(200))
+    script = "<script>" + "window.dataLayer.push({event: 'view'});" * 800 + "</script>"
+    ads = "".join(f'<div class="ad-slot"><span>Advertisement</span><p>{"Lorem ipsum dolor sit amet. " * 8}</p></div>'
+                  for _ in range(40))
+    return (f"<!DOCTYPE html><html><head><title>{title}</title>{script}</head><body>"
+            f"<nav><ul>{nav}</ul></nav>{ads}{tables}{ads}</body></html>")
+
+
+def table(header, rows) -> str:
+    head = "<tr>" + "".join(f"<th>{cell}</th>" for cell in header) + "</tr>"
+    body = "\n".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows)
+    return f"<table><thead>{head}</thead><tbody>\n{body}\n</tbody></table>"
+
+
+def kenpom(rng) -> str:
+    rows = []
+    for r in read("kenpom").itertuples(index=False):
+        extras = [f'{rng.uniform(90, 130):.1f}', f'<span class="seed">{rng.randint(1, 365)}</span>'] * 8
+        rows.append([r[1], f'<a href="team.php?team={html.escape(r[0])}">{html.escape(r[0])}</a>',
+                     f'<a href="conf.php?c={r[2]}">{r[2]}</a>', r[3], r[4]] + extras)
+    header = ["Rk", "Team", "Conf", "W-L", "NetRtg"] + ["ORtg", "Rank"] * 8
+    return page("2025 Pomeroy College Basketball Ratings", table(header, rows))
+
+
+def ncaa(rng) -> str:
+    rows = []
+    for r in read("ncaa").itertuples(index=False):
+        rows.append([r[1], str(int(r[1]) + rng.randint(-3, 3)), html.escape(r[0]), "Conf", "20-5"] + list(r[2:9]))
+    header = ["Rank", "Previous", "School", "Conference", "Record", "Road", "Neutral", "Home",
+              "Quad 1", "Quad 2", "Quad 3", "Quad 4"]
+    return page("NCAA Men's Basketball NET Rankings", table(header, rows))
+
+
+def teamrankings(source: str, rng) -> str:
+    rows = []
+    for r in read(source).itertuples(index=False):
+        record = f"{rng.randint(0, 30)}-{rng.randint(0, 30)}"
+        rows.append([r[1], f'<a href="/ncaa-basketball/team/{rng.randint(1, 999)}">{html.escape(r[0])} ({record})</a>',
+                     r[2], f"{rng.uniform(0, 1):.3f}", f"{rng.uniform(0, 1):.3f}", f"{rng.uniform(0, 1):.3f}"])
+    header = ["Rank", "Team", "Rating", "Hi", "Low", "Last"]
+    return page(f"{source.upper()} Rankings", table(header, rows))
+
+
+def espn(rng) -> str:
+    df = read("espn")
+    names = [[f'<a href="/team/_/id/{i}">{html.escape(team)}</a>', "CONF"] for i, team in enumerate(df["Team"])]
+    stats = [[f"{rng.randint(10, 30)}-{rng.randint(0, 15)}", rating, rank] +
+             [f"{rng.uniform(-10, 10):.1f}" for _ in range(5)]
+             for rating, rank in zip(df["BPI Rating"], df["BPI Rank"])]
+    header = ["W-L", "BPI", "BPI RK", "TREND", "OFF", "DEF", "SOR", "SOS"]
+    return page("ESPN BPI", table(["Team", "Conf"], names) + table(header, stats))
+
+
+def espn_api(page_size: int = 50) -> list:
+    df = read("espn")
+    stat_names = ["bpi", "bpirank", "bpioffense", "bpidefense", "sor", "sosremaining"]
+    teams = [{"team": {"displayName": team, "abbreviation": team[:4].upper()},
+              "categories": [{"name": "bpi", "totals": [rating, rank, "0.0", "0.0", "1", "1"]}]}
+             for team, rating, rank in zip(df["Team"], df["BPI Rating"], df["BPI Rank"])]
+    pages = (len(teams) + page_size - 1) // page_size
+    return [{"pagination": {"count": len(teams), "page": n + 1, "pages": pages},
+             "categories": [{"name": "bpi", "names": stat_names}],
+             "teams": teams[n * page_size:(n + 1) * page_size]}
+            for n in range(pages)]
+
+
+def sagarin(rng) -> str:
+    lines = ["<html><body><pre>", "COLLEGE BASKETBALL 2025 RATINGS", "_" * 80, ""]
+    # Every row as the page lists it, including the MEAC line that shares rank 29 with a team
+    teams = read("sagarin")
+    for r in teams.itertuples(index=False):
+        lines.append(f"{int(r[0]):>5}  {r[1]:<22} =  {float(r[2]):6.2f}   "
+                     f"{rng.randint(5, 30):>3}{rng.randint(0, 15):>4}   {rng.uniform(60, 90):6.2f}({rng.randint(1, 365):>3})")
+    # Conference listings repeat the teams with restarted ranks; the streaming parser stops here
+    lines += ["", "_" * 80, "ACC                       =  85.10"]
+    for rank, team in enumerate(teams["Team"].head(60), start=1):
+        lines.append(f"{rank:>5}  {team:<22} =  {rng.uniform(60, 90):6.2f}")
+    lines.append("</pre></body></html>")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    rng = random.Random(2025)
+    os.makedirs(FIXTURES, exist_ok=True)
+    pages = {
+        "kenpom.html": kenpom(rng),
+        "ncaa.html": ncaa(rng),
+        "rpi.html": teamrankings("rpi", rng),
+        "sos.html": teamrankings("sos", rng),
+        "espn.html": espn(rng),
+        "espn_api.json": json.dumps(espn_api(), sort_keys=True),
+        "sagarin.html": sagarin(rng)
+    }
+    for name, content in pages.items():
+        with open(os.path.join(FIXTURES, name), "w", encoding="utf-8") as f:
+            f.write(content)
+        print(f"Wrote {name} ({len(content) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Browser Pool
+Long-lived pool of headless Chrome sessions shared by the Selenium scrapers
+"""
+
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+
+
+class BrowserPool:
+    def __init__(self, size: int = 1, max_uses: int = 25, headless: bool = True):
+        """
+        Args:
+            size (int): Maximum number of live browsers
+            max_uses (int): Borrows after which a browser is recycled
+            headless (bool): Run Chrome without a window
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.headless = headless
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._uses: Dict[int, int] = {}
+        self._driver_path: Optional[str] = None
+        self._closed = False
+        atexit.register(self.shutdown)
+
+    def _resolve_driver(self) -> str:
+        """Resolve the chromedriver binary once per pool."""
+        with self._lock:
+            if self._driver_path is None:
+                self._driver_path = ChromeDriverManager().install()
+            return self._driver_path
+
+    def _create(self) -> webdriver.Chrome:
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless")
+        driver = webdriver.Chrome(service=Service(self._resolve_driver()), options=options)
+        self._uses[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver: webdriver.Chrome):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _is_healthy(self, driver: webdriver.Chrome) -> bool:
+        """Check the session still answers and has not hit its use limit."""
+        if self._uses.get(id(driver), 0) >= self.max_uses:
+            return False
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def warm(self):
+        """Start every browser up front so the first scrape doesn't pay for it."""
+        drivers = []
+        for _ in range(self.size):
+            if not self._slots.acquire(blocking=False):
+                break
+            try:
+                drivers.append(self._take())
+            except Exception:
+                self._slots.release()
+                raise
+        for driver in drivers:
+            self._give_back(driver)
+
+    def _take(self) -> webdriver.Chrome:
+        try:
+            driver = self._idle.get_nowait()
+        except queue.Empty:
+            return self._create()
+        if self._is_healthy(driver):
+            return driver
+        self._discard(driver)
+        return self._create()
+
+    def _give_back(self, driver: webdriver.Chrome):
+        if self._closed:
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+        self._slots.release()
+
+    @contextmanager
+    def borrow(self, timeout: Optional[float] = None):
+        """
+        Borrow a warm browser for the duration of a ``with`` block.
+
+        A browser that raises while borrowed is quit rather than returned,
+        so the next borrower always gets a working session.
+        """
+        if self._closed:
+            raise RuntimeError("Browser pool has been shut down")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No browser became available")
+        try:
+            driver = self._take()
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._uses[id(driver)] += 1
+        try:
+            yield driver
+        except Exception:
+            self._discard(driver)
+            self._slots.release()
+            raise
+        self._give_back(driver)
+
+    def shutdown(self):
+        """Quit every idle browser and refuse further borrows."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
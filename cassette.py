@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cassette
+Records HTTP responses and rendered pages to disk and replays them without a network
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Union
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODES = ("record", "replay")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def request_key(url: str, params: Optional[Dict] = None) -> str:
+    """Stable file name for a GET, including its query parameters."""
+    prepared = requests.Request('GET', url, params=params).prepare().url
+    return hashlib.sha256(prepared.encode('utf-8')).hexdigest()[:32]
+
+
+class Cassette:
+    def __init__(self, mode: str, root: str = 'results/cassettes', latency: Union[float, str] = 0.0):
+        """
+        Args:
+            mode (str): "record" saves every response; "replay" serves only saved ones
+            root (str): Directory holding the recorded entries
+            latency (float or str): Seconds each replayed response is delayed by,
+                or "recorded" to replay each with the time it originally took
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.mode = mode
+        self.root = root
+        self.latency = latency
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _paths(self, key: str):
+        base = os.path.join(self.root, key)
+        return f"{base}.json", f"{base}.body"
+
+    def _write(self, path: str, data: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _delay(self, recorded: float):
+        delay = recorded if self.latency == "recorded" else float(self.latency)
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url: str, params: Optional[Dict], response: requests.Response):
+        """Save a response; 304s are skipped since they carry no body to replay."""
+        if response.status_code == 304:
+            return
+        meta_path, body_path = self._paths(request_key(url, params))
+        meta = {
+            "url": url,
+            "params": params,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "elapsed": response.elapsed.total_seconds()
+        }
+        # Reading content also buffers streamed responses, so the caller can still iterate them
+        with self._lock:
+            self._write(body_path, response.content)
+            self._write(meta_path, json.dumps(meta, indent=2, sort_keys=True).encode('utf-8'))
+
+    def replay(self, url: str, params: Optional[Dict] = None) -> requests.Response:
+        """Build the recorded response for a GET."""
+        meta_path, body_path = self._paths(request_key(url, params))
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            raise CassetteMissError(f"No recording of {url} in {self.root}") from None
+
+        self._delay(meta.get("elapsed", 0.0))
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = meta.get("reason")
+        response.url = url
+        # Recorded bodies are already decoded, so the original Content-Encoding no longer applies
+        headers = CaseInsensitiveDict(meta["headers"])
+        headers.pop('Content-Encoding', None)
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        # Marked consumed so iter_content()/iter_lines() serve the body from memory
+        response._content = body
+        response._content_consumed = True
+        return response
+
+    def save_page(self, name: str, text: str, elapsed: float = 0.0):
+        """Save something fetched outside HTTP, such as a browser-rendered page."""
+        meta_path, body_path = self._paths(f"page-{name}")
+        with self._lock:
+            self._write(body_path, text.encode('utf-8'))
+            self._write(meta_path, json.dumps({"page": name, "elapsed": elapsed}).encode('utf-8'))
+
+    def load_page(self, name: str) -> str:
+        meta_path, body_path = self._paths(f"page-{name}")
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            raise CassetteMissError(f"No recording of page {name} in {self.root}") from None
+        self._delay(meta.get("elapsed", 0.0))
+        return text
+
+
+_cassette: Optional[Cassette] = None
+_configured = False
+_cassette_lock = threading.Lock()
+
+
+def configure_cassette(mode: Optional[str], root: Optional[str] = None,
+                       latency: Union[float, str, None] = None) -> Optional[Cassette]:
+    """Set the process-wide cassette; a mode of None turns recording and replay off."""
+    global _cassette, _configured
+    with _cassette_lock:
+        _cassette = None
+        if mode:
+            _cassette = Cassette(
+                mode,
+                root or os.environ.get('RANKINGS_CASSETTE_DIR', 'results/cassettes'),
+                latency if latency is not None else os.environ.get('RANKINGS_REPLAY_LATENCY', 0.0)
+            )
+        _configured = True
+        return _cassette
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The active cassette, configured from RANKINGS_CASSETTE on first use."""
+    if not _configured:
+        configure_cassette(os.environ.get('RANKINGS_CASSETTE') or None)
+    return _cassette
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Combine Rankings
+Integer team dimension and a single multi-way join across ranking sources
+"""
+
+import threading
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+
+class TeamDimension:
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Assigns every canonical team name a compact integer ID.
+
+        IDs are stable only for the life of this object and are never
+        persisted; they are unrelated to the IDs in rankings_db's teams table.
+        """
+        self._ids: Dict[str, int] = {}
+        self.names = []
+        self._lock = threading.Lock()
+        self.ids_for(pd.Series(list(names), dtype=object))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def ids_for(self, names: pd.Series) -> np.ndarray:
+        """Return the ID of each name, adding IDs for names not seen before."""
+        codes, uniques = pd.factorize(names, use_na_sentinel=False)
+        uniques = np.asarray(uniques, dtype=object)
+        with self._lock:
+            unique_ids = np.fromiter((self._ids.get(name, -1) for name in uniques),
+                                     dtype=np.int64, count=len(uniques))
+            new = np.flatnonzero(unique_ids < 0)
+            if len(new):
+                start = len(self.names)
+                new_names = uniques[new].tolist()
+                unique_ids[new] = np.arange(start, start + len(new))
+                self._ids.update(zip(new_names, range(start, start + len(new))))
+                self.names.extend(new_names)
+        return unique_ids.take(codes)
+
+    def names_for(self, ids: Iterable[int]) -> np.ndarray:
+        """Return the team name of each ID."""
+        return np.asarray(self.names, dtype=object).take(np.asarray(ids, dtype=np.int64))
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({'Team ID': np.arange(len(self.names), dtype=np.int32), 'Team': self.names})
+
+
+def combine_rankings(frames: Dict[str, pd.DataFrame], how: str = "inner",
+                     dimension: Optional[TeamDimension] = None,
+                     coverage_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    Align every source on team ID in one multi-way join.
+
+    Each source is mapped to integer IDs once; row positions for every
+    source are then looked up in dense ID-indexed arrays, so adding a
+    source costs one linear pass rather than another string-keyed merge.
+
+    Args:
+        frames (dict): Source name to DataFrame with a "Team" column
+        how (str): "inner" keeps teams every source has, "outer" keeps all teams;
+            a source with no teams (a failed fetch) doesn't restrict either join
+        dimension (TeamDimension): Shared ID assignment; a fresh one, whose IDs
+            last only for this call, is created if not given
+        coverage_column (str): If set, add an integer column whose bit i is
+            set when the i-th source in ``frames`` has the team
+
+    Returns:
+        DataFrame: "Team" followed by each source's columns, in source order;
+            rows follow the order of the first source with teams
+    """
+    if how not in ("inner", "outer"):
+        raise ValueError(f"Unsupported join: {how}")
+    dimension = dimension or TeamDimension()
+    if not frames:
+        return pd.DataFrame(columns=["Team"])
+
+    # Integer IDs per source, first row kept where a team is listed twice
+    # (duplicates would fan out the join)
+    sources = []
+    for df in frames.values():
+        if "Team" not in df.columns:
+            # A failed fetch yields a bare empty frame; treat it as a source with no teams
+            df = pd.DataFrame(columns=["Team"])
+        ids = dimension.ids_for(df["Team"])
+        first = ~pd.Index(ids).duplicated()
+        sources.append((df, ids[first], np.flatnonzero(first)))
+
+    # One pass over dense ID-indexed arrays decides the output rows
+    size = len(dimension)
+    if how == "inner":
+        present = [ids for _, ids, _ in sources if len(ids)]
+        seen = np.zeros(size, dtype=np.int32)
+        for ids in present:
+            seen[ids] += 1
+        team_ids = present[0][seen[present[0]] == len(present)] if present else np.empty(0, dtype=np.int64)
+    else:
+        added = np.zeros(size, dtype=bool)
+        ordered = []
+        for _, ids, _ in sources:
+            new_ids = ids[~added[ids]]
+            added[new_ids] = True
+            ordered.append(new_ids)
+        team_ids = np.concatenate(ordered)
+
+    columns = {"Team": dimension.names_for(team_ids)}
+    coverage = np.zeros(len(team_ids), dtype=np.int64)
+    for bit, (df, ids, rows) in enumerate(sources):
+        # Row of each output team in this source, -1 where it is missing
+        position = np.full(size, -1, dtype=np.int64)
+        position[ids] = rows
+        take = position[team_ids]
+        coverage |= (take >= 0).astype(np.int64) << bit
+        for column in df.columns:
+            if column != "Team":
+                columns[column] = pd.api.extensions.take(
+                    df[column].array, take, allow_fill=True
+                )
+
+    combined = pd.DataFrame(columns)
+    if coverage_column:
+        combined[coverage_column] = coverage
+    return combined
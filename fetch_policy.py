@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fetch Policy
+Per-source timeouts, retries with backoff, latency budgets and circuit breakers
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+import requests
+
+T = TypeVar('T')
+
+# Upstream errors worth another attempt; anything else fails immediately
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+# Total seconds a source may spend fetching, retries included; RANKINGS_BUDGET_<SOURCE> overrides one
+DEFAULT_BUDGETS = {
+    "kenpom": 30,
+    "ncaa": 30,
+    "rpi": 30,
+    "sos": 30,
+    "espn": 60,
+    "espn_browser": 120,
+    "sagarin": 60
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream that has been failing."""
+
+
+class BudgetExceededError(TimeoutError):
+    """Raised when a source has used up its latency budget."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 120):
+        """
+        Args:
+            name (str): Source the breaker guards, used in error messages
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before one trial call is let through
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if self._trial or time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            waited = time.monotonic() - self.opened_at
+            if waited >= self.reset_timeout and not self._trial:
+                # Half-open: this caller probes the upstream, everyone else keeps failing fast
+                self._trial = True
+                return
+            retry_in = max(0.0, self.reset_timeout - waited)
+        raise CircuitOpenError(f"{self.name} is failing; not retrying for another {retry_in:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class SourcePolicy:
+    def __init__(self, name: str, connect_timeout: float = 5, read_timeout: float = 20,
+                 retries: int = 2, backoff: float = 0.5, max_backoff: float = 8,
+                 budget: float = 30, failure_threshold: int = 3, reset_timeout: float = 120):
+        """
+        Args:
+            name (str): Source name
+            connect_timeout (float): Seconds to establish a connection
+            read_timeout (float): Seconds to wait for the server between bytes
+            retries (int): Further attempts after a retryable failure
+            backoff (float): Base delay before the first retry, doubled per retry
+            max_backoff (float): Longest delay between attempts
+            budget (float): Total seconds for a fetch, retries and backoff included
+            failure_threshold (int): Consecutive failed fetches that open the circuit
+            reset_timeout (float): Seconds the circuit stays open
+        """
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+
+    def deadline(self) -> float:
+        """Monotonic time by which a fetch starting now must finish."""
+        return time.monotonic() + self.budget
+
+    def timeout(self, deadline: float) -> Tuple[float, float]:
+        """(connect, read) timeouts for one attempt, clipped to what's left of the budget."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise BudgetExceededError(f"{self.name} exceeded its {self.budget:g}s budget")
+        return min(self.connect_timeout, remaining), min(self.read_timeout, remaining)
+
+    def retry_delay(self, attempt: int) -> float:
+        # Full jitter, so concurrent retries don't land on the upstream together
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def call(self, send: Callable[[Tuple[float, float]], requests.Response],
+             deadline: Optional[float] = None) -> requests.Response:
+        """
+        Send a request under this policy.
+
+        Args:
+            send (callable): Sends one attempt, given its (connect, read) timeout
+            deadline (float): Shared monotonic deadline, when several requests
+                make up one fetch; a fresh budget otherwise
+
+        Returns:
+            Response: The first successful response
+
+        Raises:
+            CircuitOpenError: The source has been failing and is not being called
+            BudgetExceededError: The budget ran out before a response succeeded
+            requests.RequestException: The last attempt's error
+        """
+        self.breaker.before_call()
+        deadline = deadline or self.deadline()
+        attempt = 0
+        while True:
+            try:
+                response = send(self.timeout(deadline))
+                if response.status_code in RETRY_STATUSES:
+                    response.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                if e.response is not None:
+                    # A streamed error body would otherwise hold its pooled connection
+                    e.response.close()
+                delay = self.retry_delay(attempt)
+                if attempt >= self.retries or time.monotonic() + delay >= deadline:
+                    self.breaker.record_failure()
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            except Exception:
+                self.breaker.record_failure()
+                raise
+
+            try:
+                response.raise_for_status()
+            except requests.HTTPError:
+                response.close()
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            return response
+
+    def run(self, fn: Callable[[], T]) -> T:
+        """Call something other than an HTTP request (such as the browser) behind the circuit breaker."""
+        self.breaker.before_call()
+        try:
+            result = fn()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+
+_policies: Dict[str, SourcePolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(source: str) -> SourcePolicy:
+    """Return the process-wide policy for a source, so its circuit breaker is shared."""
+    with _policies_lock:
+        policy = _policies.get(source)
+        if policy is None:
+            budget = float(os.environ.get(f'RANKINGS_BUDGET_{source.upper()}', DEFAULT_BUDGETS.get(source, 30)))
+            policy = _policies[source] = SourcePolicy(source, budget=budget)
+        return policy
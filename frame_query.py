@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Frame Queries
+Filtering, sorting, paging and column projection for the JSON API
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Mapping, Optional, Tuple
+import pandas as pd
+
+# Rows returned when a request gives no limit
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class QueryError(ValueError):
+    """A query parameter that can't be applied to the frame."""
+
+
+@dataclass
+class FrameQuery:
+    limit: int = DEFAULT_LIMIT
+    offset: int = 0
+    sort: List[Tuple[str, bool]] = field(default_factory=list)  # (column, ascending)
+    columns: Optional[List[str]] = None
+    conferences: Optional[List[str]] = None
+    rank_column: Optional[str] = None
+    min_rank: Optional[int] = None
+    max_rank: Optional[int] = None
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str], rank_column: Optional[str] = None) -> "FrameQuery":
+        """
+        Build a query from request arguments.
+
+        Args:
+            args (Mapping): limit, offset, sort ("col" or "-col", comma separated),
+                columns (comma separated), conference (comma separated),
+                rank_by, min_rank and max_rank
+            rank_column (str): Rank column used when rank_by isn't given
+        """
+        def integer(name, default=None):
+            value = args.get(name)
+            if value in (None, ''):
+                return default
+            try:
+                return int(value)
+            except ValueError:
+                raise QueryError(f"{name} must be an integer") from None
+
+        def names(name):
+            value = args.get(name)
+            if not value:
+                return None
+            return [part.strip() for part in value.split(',') if part.strip()]
+
+        limit = integer('limit', DEFAULT_LIMIT)
+        offset = integer('offset', 0)
+        if not 0 <= limit <= MAX_LIMIT:
+            raise QueryError(f"limit must be between 0 and {MAX_LIMIT}")
+        if offset < 0:
+            raise QueryError("offset must not be negative")
+
+        sort = [(name[1:], False) if name.startswith('-') else (name, True) for name in names('sort') or []]
+        columns = names('columns')
+        if columns is not None:
+            # Each column once, in the order first asked for; JSON records need unique keys
+            columns = list(dict.fromkeys(columns))
+        return cls(limit=limit, offset=offset, sort=sort, columns=columns,
+                   conferences=names('conference'), rank_column=args.get('rank_by') or rank_column,
+                   min_rank=integer('min_rank'), max_rank=integer('max_rank'))
+
+    def _check(self, df: pd.DataFrame, columns):
+        unknown = [column for column in columns if column not in df.columns]
+        if unknown:
+            raise QueryError(f"Unknown columns: {', '.join(unknown)}")
+
+    def apply(self, df: pd.DataFrame, conferences: Optional[pd.Series] = None) -> Tuple[pd.DataFrame, int]:
+        """
+        Filter, sort and page a frame, keeping only the requested columns.
+
+        Args:
+            df (DataFrame): Rankings with a "Team" column
+            conferences (Series): Conference of each row, needed for conference filters
+
+        Returns:
+            tuple: (page of rows, number of rows matching the filters)
+        """
+        mask = pd.Series(True, index=df.index)
+        if self.conferences is not None:
+            if conferences is None:
+                raise QueryError("Conference filter is unavailable for this source")
+            wanted = {name.lower() for name in self.conferences}
+            mask &= conferences.astype('string').str.lower().isin(wanted).fillna(False)
+        if self.min_rank is not None or self.max_rank is not None:
+            if self.rank_column is None:
+                raise QueryError("rank_by is required for rank filters on this source")
+            self._check(df, [self.rank_column])
+            ranks = df[self.rank_column]
+            if not pd.api.types.is_numeric_dtype(ranks):
+                raise QueryError(f"rank_by must be a numeric column; {self.rank_column} is not")
+            if self.min_rank is not None:
+                mask &= (ranks >= self.min_rank).fillna(False)
+            if self.max_rank is not None:
+                mask &= (ranks <= self.max_rank).fillna(False)
+        result = df[mask.to_numpy(dtype=bool)]
+
+        if self.sort:
+            self._check(df, [column for column, _ in self.sort])
+            result = result.sort_values([column for column, _ in self.sort],
+                                        ascending=[ascending for _, ascending in self.sort],
+                                        kind='stable', na_position='last')
+
+        total = len(result)
+        result = result.iloc[self.offset:self.offset + self.limit]
+        if self.columns is not None:
+            self._check(df, self.columns)
+            result = result[self.columns]
+        return result, total
@@ -0,0 +1,15 @@
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:application"
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 4))
+# Import the app once in the master so workers fork with the code already loaded.
+# Nothing data-bearing is shared this way: the page cache fills per worker after the
+# fork, and the snapshot frames are shared through the OS page cache instead, since
+# every worker maps the same Arrow files (see shared_snapshot.py). The master opens
+# no SQLite connection, so none is inherited across the fork.
+preload_app = True
+timeout = 30
+accesslog = '-'
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML Tables
+Pluggable, table-targeted row extraction for the ranking scrapers
+"""
+
+import os
+from typing import List
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+BACKENDS = ("html.parser", "strainer", "lxml", "selectolax")
+
+
+def default_backend() -> str:
+    """
+    Backend from RANKINGS_HTML_BACKEND, else the fastest one installed.
+
+    selectolax and lxml parse in C; the restricted BeautifulSoup parse is
+    the pure-Python fallback.
+    """
+    backend = os.environ.get('RANKINGS_HTML_BACKEND')
+    if backend:
+        return backend
+    if HTMLParser is not None:
+        return "selectolax"
+    if lxml is not None:
+        return "lxml"
+    return "strainer"
+
+
+def extract_rows(html: str, backend: str = None) -> List[List[str]]:
+    """
+    Return the stripped text of every <td> in every <tr>, in document order.
+
+    Each row lists all <td> descendants of its <tr>, exactly as
+    ``row.find_all('td')`` does, so callers can index columns the same way.
+
+    Args:
+        html (str): Page source
+        backend (str): One of BACKENDS; defaults to default_backend()
+
+    Returns:
+        list: One list of cell strings per <tr>
+    """
+    backend = backend or default_backend()
+    if not html or not html.strip():
+        return []
+    if backend == "html.parser":
+        # Full-page tree, as the scrapers originally built it
+        soup = BeautifulSoup(html, 'html.parser')
+        return [[td.text.strip() for td in row.find_all('td')] for row in soup.find_all('tr')]
+    if backend == "strainer":
+        # Same parser, but only <tr> subtrees are turned into objects
+        soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('tr'))
+        return [[td.text.strip() for td in row.find_all('td')] for row in soup.find_all('tr')]
+    if backend == "lxml":
+        if lxml is None:
+            raise ImportError("The lxml backend requires the lxml package")
+        doc = lxml.html.fromstring(html)
+        return [[td.text_content().strip() for td in row.iter('td')] for row in doc.iter('tr')]
+    if backend == "selectolax":
+        if HTMLParser is None:
+            raise ImportError("The selectolax backend requires the selectolax package")
+        tree = HTMLParser(html)
+        return [[td.text().strip() for td in row.css('td')] for row in tree.css('tr')]
+    raise ValueError(f"Unknown HTML backend: {backend}")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP Session
+Shared, pooled HTTP client with keep-alive and conditional GET revalidation
+"""
+
+import copy
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+from fetch_policy import SourcePolicy
+from rate_limit import HostRateLimiter, MAX_THROTTLED_RETRIES, get_rate_limiter
+from cassette import get_cassette
+
+# (connect, read) seconds for requests made without a source policy
+DEFAULT_TIMEOUT = (5, 30)
+# Seconds a request waits for a free pooled connection; pools block when full,
+# so without this a leaked connection would hang every later request to the host
+POOL_TIMEOUT = float(os.environ.get('RANKINGS_POOL_TIMEOUT', 30))
+
+
+class _BoundedWaitMixin:
+    def _get_conn(self, timeout=None):
+        # requests never passes a pool timeout, which urllib3 treats as "wait forever"
+        return super()._get_conn(timeout=POOL_TIMEOUT if timeout is None else timeout)
+
+
+class _HTTPPool(_BoundedWaitMixin, HTTPConnectionPool):
+    pass
+
+
+class _HTTPSPool(_BoundedWaitMixin, HTTPSConnectionPool):
+    pass
+
+
+class BoundedPoolAdapter(HTTPAdapter):
+    """HTTPAdapter whose full pools raise EmptyPoolError after POOL_TIMEOUT instead of blocking forever."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _HTTPPool, "https": _HTTPSPool}
+
+
+class HttpClient:
+    def __init__(self, pool_connections: int = 8, pool_maxsize: int = 4,
+                 rate_limiter: Optional[HostRateLimiter] = None):
+        """
+        Args:
+            pool_connections (int): Number of hosts to keep connection pools for
+            pool_maxsize (int): Maximum open connections per host; further
+                requests to that host wait for a free connection
+            rate_limiter (HostRateLimiter): Per-host request rate; the
+                process-wide limiter when not given
+        """
+        self.session = requests.Session()
+        adapter = BoundedPoolAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # urllib3 only advertises br when a brotli decoder is installed
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str], requests.Response]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, policy: Optional[SourcePolicy] = None, deadline: Optional[float] = None,
+            **kwargs) -> requests.Response:
+        """
+        GET a URL, revalidating against the last response for the same URL.
+
+        The returned response has a ``not_modified`` attribute. When the
+        server answers 304 it is True and the previously downloaded
+        response is returned in place of the empty 304.
+
+        With a policy, the request gets that source's timeouts, retries,
+        budget (or the given shared deadline) and circuit breaker, and
+        error statuses raise. Waiting for the host's rate limit and its
+        Retry-After pauses count against that budget. Without a policy it
+        still never waits longer than DEFAULT_TIMEOUT per attempt.
+        """
+        headers = dict(kwargs.pop('headers', None) or {})
+        cache_key = requests.Request('GET', url, params=kwargs.get('params')).prepare().url
+
+        with self._lock:
+            cached = self._validators.get(cache_key)
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        timeout = kwargs.pop('timeout', DEFAULT_TIMEOUT)
+        if policy is not None:
+            deadline = deadline or policy.deadline()
+            response = policy.call(
+                lambda attempt_timeout: self._send(url, headers, attempt_timeout, deadline, **kwargs), deadline
+            )
+        else:
+            response = self._send(url, headers, timeout, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            # The 304 has no body to read, so release its connection explicitly
+            response.close()
+            previous = copy.copy(cached[2])
+            previous.not_modified = True
+            return previous
+
+        response.not_modified = False
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code == 200 and (etag or last_modified):
+            with self._lock:
+                self._validators[cache_key] = (etag, last_modified, response)
+        return response
+
+    def _send(self, url: str, headers: Dict[str, str], timeout, deadline: Optional[float] = None,
+              **kwargs) -> requests.Response:
+        """
+        Send one request when the host has a slot, waiting out 429 responses.
+
+        With a monotonic deadline, raises BudgetExceededError rather than
+        waiting for a slot or a Retry-After pause that ends past it.
+        """
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            return cassette.replay(url, kwargs.get('params'))
+
+        for throttled in range(MAX_THROTTLED_RETRIES + 1):
+            self.rate_limiter.wait(url, deadline)
+            if deadline is not None:
+                # Time spent queued comes out of this attempt's timeout
+                remaining = max(0.001, deadline - time.monotonic())
+                timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+            response = self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+            if response.status_code != 429 or throttled == MAX_THROTTLED_RETRIES:
+                if cassette is not None and cassette.recording:
+                    cassette.record(url, kwargs.get('params'), response)
+                return response
+            seconds = self.rate_limiter.throttle(url, response.headers.get('Retry-After'))
+            print(f"{urlsplit(url).netloc} is throttling requests; pausing it for {seconds:.0f}s")
+            response.close()
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+_shared_client: Optional[HttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_session() -> HttpClient:
+    """Return the process-wide HTTP client shared by every scraper."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental Refresh
+Content-hash change detection so unchanged sources are not parsed again
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+import pandas as pd
+from snapshot_store import SnapshotStore
+
+
+def payload_hash(payload: str) -> str:
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class IncrementalRefresher:
+    def __init__(self, parser, store: SnapshotStore,
+                 state_path: str = os.environ.get('RANKINGS_HASH_STATE', 'results/source_hashes.json')):
+        """
+        Args:
+            parser (BasketballRankingsParser): Provides fetch_raw() and parse_raw()
+            store (SnapshotStore): Holds the last parsed frame of every source
+            state_path (str): JSON file with the payload hash of each source's last snapshot
+        """
+        self.parser = parser
+        self.store = store
+        self.state_path = state_path
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict[str, str]]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable hash state {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def refresh_source(self, source: str) -> Tuple[pd.DataFrame, bool]:
+        """
+        Fetch one source and parse it only if its payload changed.
+
+        Returns:
+            tuple: (frame, whether the source changed since its last snapshot)
+        """
+        payload = self.parser.fetch_raw(source)
+        digest = payload_hash(payload)
+
+        if self.state.get(source, {}).get('hash') == digest:
+            previous = self.store.latest(source)
+            if previous is not None:
+                return previous, False
+
+        df = self.parser.parse_raw(source, payload)
+        if not df.empty:
+            self.store.append(source, df)
+            self.state[source] = {'hash': digest, 'fetched_at': datetime.now(timezone.utc).isoformat()}
+        return df, True
+
+    def refresh(self, sources: Optional[Iterable[str]] = None,
+                max_workers: Optional[int] = None) -> Tuple[Dict[str, pd.DataFrame], Set[str]]:
+        """
+        Refresh every source in parallel.
+
+        Args:
+            sources (iterable): Sources to refresh, every source by default
+            max_workers (int): Sources refreshed at once, all of them by default
+
+        Returns:
+            tuple: (source name to frame, names of the sources that changed)
+        """
+        sources = list(sources or self.parser.source_names())
+        frames, changed = {}, set()
+        with ThreadPoolExecutor(max_workers=max_workers or len(sources)) as executor:
+            tasks = {source: executor.submit(self.refresh_source, source) for source in sources}
+            for source, task in tasks.items():
+                try:
+                    frames[source], source_changed = task.result()
+                except Exception as e:
+                    print(f"Error fetching {source} rankings: {e}")
+                    frames[source], source_changed = pd.DataFrame(), True
+                if source_changed:
+                    changed.add(source)
+        self._save_state()
+        return frames, changed
@@ -5,167 +5,443 @@ Combined Basketball Rankings Script
 Combines rankings from multiple sources
 """
 
+import argparse
+import asyncio
+import json
+import os
 import time
-import requests
 import pandas as pd
 import re
-from typing import Optional
-from bs4 import BeautifulSoup
-from selenium import webdriver
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import NoSuchElementException
 from team_name_standardizer import EnhancedTeamNameStandardizer
+from browser_pool import BrowserPool
+from http_session import get_session
+from fetch_policy import BudgetExceededError, get_policy
+from async_fetch import AsyncFetchEngine, FetchJob
+from html_tables import default_backend, extract_rows
+from combine import combine_rankings
+from schema import apply_schema
+from snapshot_store import SnapshotStore
+from incremental import IncrementalRefresher
+from rankings_db import RankingsDB
+from shared_snapshot import SharedSnapshot
+from cassette import configure_cassette, get_cassette
+from metrics import PAYLOAD_BYTES, ROWS, STAGE_FAILURES, STAGE_SECONDS, stage, summary_table
+from profiling import enable_profiling
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+# Single-page HTML sources; ESPN is fetched separately
+SOURCE_URLS = {
+    "kenpom": "https://kenpom.com/index.php",
+    "ncaa": "https://www.ncaa.com/rankings/basketball-men/d1/ncaa-mens-basketball-net-rankings",
+    "rpi": "https://www.teamrankings.com/ncb/rpi/",
+    "sos": "https://www.teamrankings.com/ncaa-basketball/ranking/schedule-strength-by-other"
+}
+ESPN_BPI_API_URL = "https://site.web.api.espn.com/apis/fitt/v3/sports/basketball/mens-college-basketball/powerindex"
 
 
 class BasketballRankingsParser:
     def __init__(self):
         self.headers = {'User-Agent': 'Mozilla/5.0'}
         self.team_name_standardizer = EnhancedTeamNameStandardizer()
+        # One pooled keep-alive session for every scraper, plus the last parse per URL
+        self.http = get_session()
+        self._parsed: Dict[str, pd.DataFrame] = {}
+        # Table row extraction engine, see html_tables.BACKENDS
+        self.html_backend = default_backend()
+        # ESPN_FETCH_MODE=browser skips the data endpoint and always renders the page
+        self.espn_mode = os.environ.get('ESPN_FETCH_MODE', 'api')
+        self.espn_api_url = os.environ.get('ESPN_BPI_API_URL', ESPN_BPI_API_URL)
+        self.espn_page_size = 50
+        # Chrome starts lazily on the first ESPN scrape and is reused after that
+        self.browser_pool = BrowserPool(
+            size=int(os.environ.get('BROWSER_POOL_SIZE', 1)),
+            max_uses=int(os.environ.get('BROWSER_MAX_USES', 25))
+        )
 
     def standardize_team_name(self, team_name: str) -> str:
         """Standardize team names using the EnhancedTeamNameStandardizer."""
         return self.team_name_standardizer.clean_name(team_name)
 
+    def standardize_team_names(self, team_names) -> pd.Series:
+        """Standardize a whole column of team names at once."""
+        with stage("standardize"):
+            return self.team_name_standardizer.standardize_names(team_names)
+
     def clean_text(self, text: str) -> str:
         """Remove HTML tags and clean up the text."""
         clean = re.sub(r'<[^>]+>', '', text)
         clean = re.sub(r'\[.*?\]', '', clean)
         return clean.strip()
     
-    def fetch_all_rankings(self):
-        """Fetch all rankings in parallel using multithreading."""
-        with ThreadPoolExecutor() as executor:
-            # Define tasks for fetching data
-            tasks = {
-                "kenpom": executor.submit(self.get_kenpom_rankings),
-                "ncaa": executor.submit(self.get_ncaa_rankings),
-                "rpi": executor.submit(self.get_rpi_rankings),
-                "sos": executor.submit(self.get_sos_rankings),
-                "espn": executor.submit(self.get_espn_rankings)
+    def fetch_all_rankings(self, fetchers: Optional[Dict[str, Callable[[], pd.DataFrame]]] = None,
+                           timeout: Optional[float] = None, engine: str = "threads",
+                           max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch all rankings in parallel using multithreading.
+
+        Args:
+            fetchers (dict): Source name to fetch function, defaults to every source
+            timeout (float): Overall deadline in seconds; sources that have not
+                finished by then are left out of the result
+            engine (str): "threads", or "async" to fetch every source with the
+                asyncio engine (only when ``fetchers`` is not given)
+            max_workers (int): Sources fetched at once with the "threads"
+                engine, all of them by default
+
+        Returns:
+            dict: Source name to DataFrame, in the order of ``fetchers``
+        """
+        if engine == "async" and fetchers is None:
+            return asyncio.run(self._collect_rankings_async(timeout))
+
+        if fetchers is None:
+            fetchers = {
+                "kenpom": self.get_kenpom_rankings,
+                "ncaa": self.get_ncaa_rankings,
+                "rpi": self.get_rpi_rankings,
+                "sos": self.get_sos_rankings,
+                "espn": self.get_espn_rankings
             }
 
-            # Collect results as they are completed
-            results = {}
-            for source, task in tasks.items():
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(fetchers))
+        # Define tasks for fetching data
+        tasks = {executor.submit(fetch): source for source, fetch in fetchers.items()}
+
+        # Collect results as they are completed
+        results = {}
+        try:
+            for task in as_completed(tasks, timeout=timeout):
+                source = tasks[task]
                 try:
-                    results[source] = task.result()  # Get the result of each task
+                    results[source] = task.result()
                 except Exception as e:
                     print(f"Error fetching {source} rankings: {e}")
                     results[source] = pd.DataFrame()  # Empty DataFrame on failure
+        except FuturesTimeoutError:
+            late = [source for task, source in tasks.items() if not task.done()]
+            print(f"Deadline reached before {', '.join(late)} finished")
+        finally:
+            # Don't hold the caller past the deadline for stragglers
+            executor.shutdown(wait=False)
+
+        return {source: results[source] for source in fetchers if source in results}
+
 
-        return results
+    async def iter_rankings_async(self, engine: Optional[AsyncFetchEngine] = None,
+                                  executor: Optional[ThreadPoolExecutor] = None) -> AsyncIterator[Tuple[str, pd.DataFrame]]:
+        """
+        Yield (source, DataFrame) pairs as each source finishes, using asyncio.
+
+        HTML pages are fetched by the async engine and parsed off the event
+        loop; ESPN runs its own fetch path in a worker thread alongside them.
+        """
+        engine = engine or AsyncFetchEngine(headers=self.headers)
+        loop = asyncio.get_running_loop()
+        finished: asyncio.Queue = asyncio.Queue()
+
+        async def run_espn():
+            try:
+                try:
+                    df = await loop.run_in_executor(executor, self.get_espn_rankings)
+                except Exception as e:
+                    print(f"Error fetching espn rankings: {e}")
+                    df = pd.DataFrame()
+                await finished.put(("espn", df))
+            finally:
+                # Tells the consumer this producer is done, however it ended
+                finished.put_nowait(None)
+
+        async def parse_page(result) -> pd.DataFrame:
+            if not result.ok:
+                print(f"Error fetching {result.key} rankings: {result.error or result.status}")
+                STAGE_FAILURES.inc(source=result.key, stage="fetch")
+                return pd.DataFrame()
+            STAGE_SECONDS.observe(result.elapsed, source=result.key, stage="fetch")
+            PAYLOAD_BYTES.inc(len(result.text.encode('utf-8')), source=result.key)
+            parse = getattr(self, f"parse_{result.key}_rankings")
+            try:
+                return await loop.run_in_executor(executor, self._parse, result.key, parse, result.text)
+            except Exception as e:
+                print(f"Error parsing {result.key} rankings: {e}")
+                return pd.DataFrame()
+
+        async def run_pages():
+            jobs = [FetchJob(source, url, source=source) for source, url in SOURCE_URLS.items()]
+            try:
+                async for result in engine.fetch_iter(jobs):
+                    await finished.put((result.key, await parse_page(result)))
+            except Exception as e:
+                print(f"Error fetching rankings pages: {e}")
+            finally:
+                finished.put_nowait(None)
+
+        producers = [asyncio.ensure_future(run_espn()), asyncio.ensure_future(run_pages())]
+        try:
+            # Stop once both producers are done, even if one ended without every source
+            running = len(producers)
+            while running:
+                item = await finished.get()
+                if item is None:
+                    running -= 1
+                else:
+                    yield item
+        finally:
+            for producer in producers:
+                producer.cancel()
 
+    async def _collect_rankings_async(self, timeout: Optional[float]) -> Dict[str, pd.DataFrame]:
+        # A private pool so a straggling ESPN thread can't hold asyncio.run() past the deadline
+        executor = ThreadPoolExecutor(max_workers=4)
+        results = {}
+
+        async def collect():
+            async for source, df in self.iter_rankings_async(executor=executor):
+                results[source] = df
+
+        try:
+            await asyncio.wait_for(collect(), timeout)
+        except asyncio.TimeoutError:
+            late = [source for source in list(SOURCE_URLS) + ["espn"] if source not in results]
+            print(f"Deadline reached before {', '.join(late)} finished")
+        finally:
+            executor.shutdown(wait=False)
+
+        order = list(SOURCE_URLS) + ["espn"]
+        return {source: results[source] for source in order if source in results}
+
+    def _fetch_and_parse(self, source: str, parse: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        """Fetch a source's page through the shared session, skipping the parse when it hasn't changed."""
+        url = SOURCE_URLS[source]
+        with stage("fetch", source):
+            response = self.http.get(url, headers=self.headers, policy=get_policy(source))
+        cached = self._parsed.get(url)
+        if response.not_modified and cached is not None:
+            return cached.copy()
+
+        PAYLOAD_BYTES.inc(len(response.content), source=source)
+        df = self._parse(source, parse, response.text)
+        self._parsed[url] = df
+        return df.copy()
+
+    def _parse(self, source: str, parse: Callable[[str], pd.DataFrame], payload) -> pd.DataFrame:
+        """Run a parser as the source's parse stage, counting the rows it produced."""
+        with stage("parse", source):
+            df = parse(payload)
+        ROWS.inc(len(df), source=source)
+        return df
 
     def get_kenpom_rankings(self) -> pd.DataFrame:
         """Get KenPom rankings."""
-        url = "https://kenpom.com/index.php"
-        response = requests.get(url, headers=self.headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return self._fetch_and_parse("kenpom", self.parse_kenpom_rankings)
+
+    def parse_kenpom_rankings(self, html: str) -> pd.DataFrame:
+        """Parse the KenPom ratings page."""
+        rows = extract_rows(html, self.html_backend)
         
         teams, ranks, conference, win_loss, netrtg = [], [], [], [], []
         
-        for row in soup.find_all('tr')[1:]:
-            cols = row.find_all('td')
+        for cols in rows[1:]:
             if len(cols) >= 5:
-                ranks.append(cols[0].text.strip())
-                teams.append(self.standardize_team_name(cols[1].text.strip()))
-                conference.append(cols[2].text.strip())
-                win_loss.append(cols[3].text.strip())
-                netrtg.append(cols[4].text.strip())
+                ranks.append(cols[0])
+                teams.append(cols[1])
+                conference.append(cols[2])
+                win_loss.append(cols[3])
+                netrtg.append(cols[4])
         
-        return pd.DataFrame({
-            'Team': teams,
+        kenpom_df = pd.DataFrame({
+            'Team': self.standardize_team_names(teams),
             'KP Rank': ranks,
             'KP Conference': conference,
             'Win Loss': win_loss,
             'KP Net Rtg': netrtg
         })
+        return apply_schema(kenpom_df, "kenpom")
 
     def get_ncaa_rankings(self) -> pd.DataFrame:
         """Get NCAA rankings."""
-        url = "https://www.ncaa.com/rankings/basketball-men/d1/ncaa-mens-basketball-net-rankings"
-        response = requests.get(url, headers=self.headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return self._fetch_and_parse("ncaa", self.parse_ncaa_rankings)
+
+    def parse_ncaa_rankings(self, html: str) -> pd.DataFrame:
+        """Parse the NCAA NET rankings page."""
+        rows = extract_rows(html, self.html_backend)
         
         ncaa_data = []
-        for row in soup.find_all('tr')[1:]:
-            cols = row.find_all('td')
+        for cols in rows[1:]:
             if len(cols) >= 12:
-                rank_ncaa = cols[0].text.strip()
-                team = self.standardize_team_name(cols[2].text.strip())
-                road = cols[5].text.strip()
-                neutral = cols[6].text.strip()
-                home = cols[7].text.strip()
-                quads = [col.text.strip() for col in cols[8:12]]
+                rank_ncaa = cols[0]
+                team = cols[2]
+                road = cols[5]
+                neutral = cols[6]
+                home = cols[7]
+                quads = cols[8:12]
                 ncaa_data.append([team, rank_ncaa, road, neutral, home] + quads)
         
-        return pd.DataFrame(ncaa_data, columns=[
+        ncaa_df = pd.DataFrame(ncaa_data, columns=[
             "Team", "NCAA Rank", "Road", "Neutral", "Home",
             "Quad1", "Quad2", "Quad3", "Quad4"
         ])
+        ncaa_df['Team'] = self.standardize_team_names(ncaa_df['Team'])
+        return apply_schema(ncaa_df, "ncaa")
 
     def get_rpi_rankings(self) -> pd.DataFrame:
         """Get RPI rankings."""
-        url = "https://www.teamrankings.com/ncb/rpi/"
-        response = requests.get(url, headers=self.headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return self._fetch_and_parse("rpi", self.parse_rpi_rankings)
+
+    def parse_rpi_rankings(self, html: str) -> pd.DataFrame:
+        """Parse the teamrankings.com RPI page."""
+        rows = extract_rows(html, self.html_backend)
         
         rpi_data = []
-        for row in soup.find_all('tr')[1:]:
-            cols = row.find_all('td')
+        for cols in rows[1:]:
             if len(cols) >= 5:
-                rank_rpi = cols[0].text.strip()
-                team_full = cols[1].text.strip()
-                rating = cols[2].text.strip()
+                rank_rpi = cols[0]
+                team_full = cols[1]
+                rating = cols[2]
                 
-                # Clean team name and standardize
+                # Strip the record; names are standardized per column below
                 team_name = team_full.split(' (')[0].strip()
-                team_name = self.standardize_team_name(team_name)
                 rpi_data.append([team_name, rank_rpi, rating])
         
-        return pd.DataFrame(rpi_data, columns=["Team", "RPI Rank", "RPI Rating"])
+        rpi_df = pd.DataFrame(rpi_data, columns=["Team", "RPI Rank", "RPI Rating"])
+        rpi_df['Team'] = self.standardize_team_names(rpi_df['Team'])
+        return apply_schema(rpi_df, "rpi")
 
     def get_sos_rankings(self) -> pd.DataFrame:
         """Get Schedule Strength rankings."""
-        url = "https://www.teamrankings.com/ncaa-basketball/ranking/schedule-strength-by-other"
-        response = requests.get(url, headers=self.headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return self._fetch_and_parse("sos", self.parse_sos_rankings)
+
+    def parse_sos_rankings(self, html: str) -> pd.DataFrame:
+        """Parse the teamrankings.com schedule strength page."""
+        rows = extract_rows(html, self.html_backend)
         
         sos_data = []
-        for row in soup.find_all('tr')[1:]:
-            cols = row.find_all('td')
+        for cols in rows[1:]:
             if len(cols) >= 5:
-                sos_rank = cols[0].text.strip()
-                team_full = cols[1].text.strip()
-                sos_rating = cols[2].text.strip()
+                sos_rank = cols[0]
+                team_full = cols[1]
+                sos_rating = cols[2]
                 
-                # Clean team name and standardize
+                # Strip the record; names are standardized per column below
                 team_name = team_full.split(' (')[0].strip()
-                team_name = self.standardize_team_name(team_name)
                 sos_data.append([team_name, sos_rank, sos_rating])
         
-        return pd.DataFrame(sos_data, columns=["Team", "SOS Rank", "SOS Rating"])
+        sos_df = pd.DataFrame(sos_data, columns=["Team", "SOS Rank", "SOS Rating"])
+        sos_df['Team'] = self.standardize_team_names(sos_df['Team'])
+        return apply_schema(sos_df, "sos")
 
     def get_espn_rankings(self) -> pd.DataFrame:
-        try:
-            # Set up Selenium WebDriver
-            options = webdriver.ChromeOptions()
-            options.add_argument("--headless")
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-            
+        """Get ESPN BPI rankings, from the JSON data endpoint when possible."""
+        if self.espn_mode == "api":
+            try:
+                return self.get_espn_api_rankings()
+            except Exception as e:
+                print(f"ESPN data endpoint failed, falling back to browser: {e}")
+        return self.get_espn_browser_rankings()
+
+    def get_espn_api_rankings(self) -> pd.DataFrame:
+        """Get ESPN BPI rankings from the paginated data endpoint behind the BPI page."""
+        with stage("fetch", "espn"):
+            pages = self.fetch_espn_api_pages()
+        return self._parse("espn", self.parse_espn_api_pages, pages)
+
+    def fetch_espn_api_pages(self) -> List[dict]:
+        """Fetch every page of the ESPN power index endpoint."""
+        # Every page shares one latency budget
+        deadline = get_policy("espn").deadline()
+        first_page = self._get_espn_bpi_page(1, deadline)
+        page_count = int(first_page.get('pagination', {}).get('pages', 1))
+
+        pages = [first_page]
+        if page_count > 1:
+            # The first page tells us how many there are; fetch the rest together
+            with ThreadPoolExecutor(max_workers=min(page_count - 1, 8)) as executor:
+                pages.extend(executor.map(lambda page: self._get_espn_bpi_page(page, deadline),
+                                          range(2, page_count + 1)))
+        return pages
+
+    def parse_espn_api_pages(self, pages: List[dict]) -> pd.DataFrame:
+        """Parse power index endpoint pages into the BPI frame."""
+        espn_data = []
+        for page in pages:
+            espn_data.extend(self._parse_espn_bpi_page(page))
+        if not espn_data:
+            raise ValueError("ESPN data endpoint returned no teams")
+
+        espn_df = pd.DataFrame(espn_data, columns=["Team", "BPI Rating", "BPI Rank"])
+        espn_df['Team'] = self.standardize_team_names(espn_df['Team'])
+        espn_df = apply_schema(espn_df, "espn")
+        return espn_df.sort_values('BPI Rank').reset_index(drop=True)
+
+    def _get_espn_bpi_page(self, page: int, deadline: Optional[float] = None) -> dict:
+        """Fetch one page of the ESPN power index endpoint."""
+        params = {'region': 'us', 'lang': 'en', 'limit': self.espn_page_size, 'page': page}
+        response = self.http.get(self.espn_api_url, params=params, headers=self.headers,
+                                 policy=get_policy("espn"), deadline=deadline)
+        PAYLOAD_BYTES.inc(len(response.content), source="espn")
+        return response.json()
+
+    def _parse_espn_bpi_page(self, payload: dict) -> List[List[str]]:
+        """Extract [team, BPI rating, BPI rank] rows from one endpoint page."""
+        # Stat positions are described once per page, not per team
+        names = []
+        for category in payload.get('categories', []):
+            if category.get('name') == 'bpi':
+                names = category.get('names', [])
+        rating_idx, rank_idx = names.index('bpi'), names.index('bpirank')
+
+        rows = []
+        for entry in payload.get('teams', []):
+            for category in entry.get('categories', []):
+                if category.get('name') != 'bpi':
+                    continue
+                # Display strings match what the rendered table shows
+                values = category.get('totals') or [str(v) for v in category.get('values', [])]
+                rows.append([entry['team']['displayName'], values[rating_idx], values[rank_idx]])
+        return rows
+
+    def get_espn_browser_rankings(self) -> pd.DataFrame:
+        """Get ESPN BPI rankings by rendering the BPI page in a headless browser."""
+        # Errors propagate so callers can tell a failed fetch from an empty one
+        with stage("browser", "espn"):
+            page_source = self.fetch_espn_page_source()
+        return self._parse("espn", self.parse_espn_page, page_source)
+
+    def fetch_espn_page_source(self) -> str:
+        """Render the full ESPN BPI page, expanding every "Load More" section."""
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            page_source = cassette.load_page("espn_bpi")
+            PAYLOAD_BYTES.inc(len(page_source.encode('utf-8')), source="espn")
+            return page_source
+
+        # The browser fallback has its own breaker so a failing data endpoint doesn't trip it
+        policy = get_policy("espn_browser")
+        start = time.monotonic()
+        page_source = policy.run(lambda: self._render_espn_page(start + policy.budget))
+        PAYLOAD_BYTES.inc(len(page_source.encode('utf-8')), source="espn")
+        if cassette is not None and cassette.recording:
+            cassette.save_page("espn_bpi", page_source, elapsed=time.monotonic() - start)
+        return page_source
+
+    def _render_espn_page(self, deadline: float) -> str:
+        # Borrow a warm browser from the pool instead of starting Chrome
+        with self.browser_pool.borrow(timeout=max(0.0, deadline - time.monotonic())) as driver:
+            driver.set_page_load_timeout(max(1.0, deadline - time.monotonic()))
             # Navigate to ESPN BPI page
             espn_url = "https://www.espn.com/mens-college-basketball/bpi"
             driver.get(espn_url)
 
             # Use WebDriverWait for the "Load More" button to minimize sleep
             while True:
+                if time.monotonic() >= deadline:
+                    raise BudgetExceededError("ESPN page exceeded its latency budget while loading more rows")
                 try:
                     WebDriverWait(driver, 5).until(
                         EC.element_to_be_clickable((By.CLASS_NAME, "loadMore__link"))
@@ -174,79 +450,196 @@ class BasketballRankingsParser:
                     # Exit loop when no "Load More" button is found
                     break
 
-            # Parse the page with BeautifulSoup
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            driver.quit()
-
-            # Initialize data collection
-            team_names = []
-            bpi_data = []
-
-            # Extract team names and BPI data
-            for row in soup.find_all('tr'):
-                cols = row.find_all('td')
-                if len(cols) == 2:  # Rows with team names
-                    team_name = self.standardize_team_name(cols[0].text.strip())
-                    team_names.append(team_name)
-                elif len(cols) >= 7:  # Rows with BPI data
-                    bpi_rating = cols[1].text.strip()
-                    bpi_rank = cols[2].text.strip()
-                    bpi_data.append([bpi_rating, bpi_rank])
-
-            # Combine data into DataFrame
-            if len(team_names) == len(bpi_data):
-                espn_data = [
-                    [team_names[i]] + bpi_data[i][:] for i in range(len(team_names))
-                ]
-                espn_df = pd.DataFrame(espn_data, columns=["Team", "BPI Rating", "BPI Rank"])
-                return espn_df.sort_values('BPI Rank').reset_index(drop=True)
-
-            # Return an empty DataFrame if there's a mismatch
-            return pd.DataFrame(columns=["Team", "BPI Rating", "BPI Rank"])
-
-        except Exception as e:
-            print(f"Error getting ESPN rankings: {str(e)}")
-            return pd.DataFrame(columns=["Team", "BPI Rating", "BPI Rank"])
-
-
-def main():
+            return driver.page_source
+
+    def parse_espn_page(self, html: str) -> pd.DataFrame:
+        """Parse the rendered ESPN BPI page."""
+        # Parse only the table rows of the rendered page
+        rows = extract_rows(html, self.html_backend)
+
+        # Initialize data collection
+        team_names = []
+        bpi_data = []
+
+        # Extract team names and BPI data
+        for cols in rows:
+            if len(cols) == 2:  # Rows with team names
+                team_names.append(cols[0])
+            elif len(cols) >= 7:  # Rows with BPI data
+                bpi_rating = cols[1]
+                bpi_rank = cols[2]
+                bpi_data.append([bpi_rating, bpi_rank])
+
+        # Combine data into DataFrame
+        if len(team_names) == len(bpi_data):
+            espn_data = [
+                [team_names[i]] + bpi_data[i][:] for i in range(len(team_names))
+            ]
+            espn_df = pd.DataFrame(espn_data, columns=["Team", "BPI Rating", "BPI Rank"])
+            espn_df['Team'] = self.standardize_team_names(espn_df['Team'])
+            espn_df = apply_schema(espn_df, "espn")
+            return espn_df.sort_values('BPI Rank').reset_index(drop=True)
+
+        # Return an empty DataFrame if there's a mismatch
+        return pd.DataFrame(columns=["Team", "BPI Rating", "BPI Rank"])
+
+    def source_names(self) -> List[str]:
+        """Every source fetch_raw() understands, in combine order."""
+        return list(SOURCE_URLS) + ["espn"]
+
+    def fetch_raw(self, source: str) -> str:
+        """
+        Fetch a source's raw payload without parsing it.
+
+        HTML sources return the page text. ESPN returns the endpoint pages as
+        canonical JSON, or the rendered page when the endpoint is unavailable.
+        """
+        if source not in SOURCE_URLS and source != "espn":
+            raise ValueError(f"Unknown source: {source}")
+        with stage("fetch", source):
+            return self._fetch_raw_payload(source)
+
+    def _fetch_raw_payload(self, source: str) -> str:
+        if source in SOURCE_URLS:
+            response = self.http.get(SOURCE_URLS[source], headers=self.headers, policy=get_policy(source))
+            PAYLOAD_BYTES.inc(len(response.content), source=source)
+            return response.text
+        if self.espn_mode == "api":
+            try:
+                return json.dumps(self.fetch_espn_api_pages(), sort_keys=True)
+            except Exception as e:
+                print(f"ESPN data endpoint failed, falling back to browser: {e}")
+        return self.fetch_espn_page_source()
+
+    def parse_raw(self, source: str, payload: str) -> pd.DataFrame:
+        """Parse a payload returned by fetch_raw()."""
+        if source == "espn":
+            if payload.startswith('['):
+                return self._parse(source, self.parse_espn_api_pages, json.loads(payload))
+            return self._parse(source, self.parse_espn_page, payload)
+        return self._parse(source, getattr(self, f"parse_{source}_rankings"), payload)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    args = argparse.ArgumentParser(description="Fetch, combine and save college basketball rankings.")
+    cassette = args.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="DIR",
+                          help="save every HTTP response and the rendered ESPN page to DIR")
+    cassette.add_argument("--replay", metavar="DIR",
+                          help="serve every fetch from a cassette recorded with --record, without the network")
+    args.add_argument("--latency", default=None,
+                      help="seconds to delay each replayed response, or 'recorded' for the original timings")
+    args.add_argument("--profile", nargs="?", const="", default=None, metavar="DIR",
+                      help="save a cProfile capture of every stage of every source, fetching "
+                           "one source at a time (under DIR, default results/profiles)")
+    return args.parse_args(argv)
+
+def print_run_report(profiler=None):
+    """Print the stage timings, and where this run's profiles went."""
+    print(f"\nStage timings:\n{summary_table()}")
+    if profiler is not None:
+        print(f"\nProfiles saved to {profiler.path}; list the hot functions with:")
+        print(f"  python profiling.py {profiler.path}")
+        if profiler.skipped:
+            print(f"  ({profiler.skipped} stages overlapped another capture and were not profiled)")
+
+def main(argv: Optional[List[str]] = None):
+    options = parse_args(argv)
+    # RANKINGS_CASSETTE=record|replay does the same without flags (e.g. for the web app)
+    if options.record or options.replay:
+        mode = "record" if options.record else "replay"
+        configure_cassette(mode, options.record or options.replay, options.latency)
+        print(f"Cassette {mode} mode: {options.record or options.replay}")
+
+    profiler = None
+    if options.profile is not None:
+        profiler = enable_profiling(options.profile or None)
+        print(f"Profiling every stage into {profiler.path}")
+
     parser = BasketballRankingsParser()
     print("Fetching rankings from multiple sources...")
 
-    # Fetch all rankings in parallel
-    rankings = parser.fetch_all_rankings()
+    # Every run also appends to the columnar history when pyarrow is available
+    try:
+        store = SnapshotStore()
+    except ImportError as e:
+        store = None
+        print(f"Snapshot history disabled: {e}")
+    # Indexed store the web app serves from
+    db = RankingsDB()
+
+    # RANKINGS_INCREMENTAL=1 skips parsing sources whose payload hasn't changed
+    incremental = os.environ.get('RANKINGS_INCREMENTAL') == '1'
+    if incremental and store is None:
+        print("Incremental refresh needs the snapshot history; fetching everything")
+        incremental = False
+
+    # Python 3.12+ runs one cProfile per process, so profiled runs fetch one source at a time
+    max_workers = 1 if profiler is not None else None
+    engine = os.environ.get('RANKINGS_FETCH_ENGINE', 'threads')
+    if profiler is not None and engine != 'threads':
+        print("Profiling fetches sources one at a time; ignoring RANKINGS_FETCH_ENGINE")
+        engine = 'threads'
+
+    if incremental:
+        rankings, changed = IncrementalRefresher(parser, store).refresh(max_workers=max_workers)
+    else:
+        # Fetch all rankings in parallel; RANKINGS_FETCH_ENGINE=async uses asyncio instead of threads
+        rankings = parser.fetch_all_rankings(engine=engine, max_workers=max_workers)
+        changed = set(rankings)
 
     # Save individual rankings
     for source, df in rankings.items():
-        if not df.empty:
+        if source not in changed:
+            print(f"{source.capitalize()} rankings unchanged since the last run.")
+        elif not df.empty:
             output_path = f"results/{source}.csv"
             df.to_csv(output_path, index=False)
             print(f"{source.capitalize()} rankings saved to {output_path}")
+            if store is not None and not incremental:
+                store.append(source, df)
+            db.write_snapshot(source, df)
         else:
             print(f"Failed to fetch {source.capitalize()} rankings.")
 
+    if not changed:
+        print("\nNo source changed; combined_rankings.csv is already up to date.")
+        print_run_report(profiler)
+        return
+
     print("\nCombining rankings...")
 
+    # Failed sources come back empty; leaving them in would empty the inner join
+    frames = {source: df for source, df in rankings.items() if not df.empty}
+
     # Combine all fetched rankings into a single DataFrame
     combined_df = None
-    for df in rankings.values():
-        if combined_df is None:
-            combined_df = df
-        else:
-            combined_df = pd.merge(combined_df, df, on="Team", how="inner")
+    if frames:
+        with stage("combine", "combined"):
+            combined_df = combine_rankings(frames)
 
     if combined_df is not None and not combined_df.empty:
         combined_df.to_csv('combined_rankings.csv', index=False)
         print(f"\nProcessed {len(combined_df)} teams across all rankings")
         print("All rankings have been saved to combined_rankings.csv")
     else:
+        combined_df = None
         print("No rankings to combine.")
 
+    # Publish for the production web workers (wsgi.py), which serve only this snapshot;
+    # sources that failed and an empty combined table keep their last published files
+    try:
+        version = SharedSnapshot().publish(
+            {source: df for source, df in frames.items() if source in changed}, combined=combined_df
+        )
+        print(f"Published snapshot {version} for the web workers")
+    except ImportError as e:
+        print(f"Shared snapshot disabled: {e}")
+
     # Identify unmatched teams
     all_teams = set()
-    for df in rankings.values():
-        if not df.empty:
-            all_teams.update(df['Team'].unique())
+    for df in frames.values():
+        all_teams.update(df['Team'].unique())
 
     matched_teams = set(combined_df['Team'].unique()) if combined_df is not None else set()
     unmatched_teams = all_teams - matched_teams
@@ -256,5 +649,7 @@ def main():
         for team in sorted(unmatched_teams):
             print(f"  {team}")
 
+    print_run_report(profiler)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
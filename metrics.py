@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics
+In-process counters and latency histograms, exported in the Prometheus text format
+"""
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from profiling import profiled
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Source whose work is running in this thread, so nested stages inherit it
+current_source: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('current_source', default=None)
+
+
+def _label_text(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self.values.get(tuple(str(labels.get(name, "")) for name in self.labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_text(dict(zip(self.labels, key)))} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: [bucket counts, sum, count, max]
+        self.series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+            series[3] = max(series[3], value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels) -> float:
+        """Estimate a quantile from the buckets, interpolating within the one it falls in."""
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None or series[2] == 0:
+                return 0.0
+            counts, _, count, maximum = series
+            target = q * count
+            cumulative, lower = 0, 0.0
+            for bound, bucket in zip(self.buckets, counts):
+                if bucket and cumulative + bucket >= target:
+                    upper = min(bound, maximum)
+                    return lower + (upper - lower) * (target - cumulative) / bucket
+                cumulative += bucket
+                lower = bound
+            return maximum
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count, _) in sorted(self.series.items()):
+                labels = dict(zip(self.labels, key))
+                cumulative = 0
+                for bound, bucket in zip(self.buckets, counts):
+                    cumulative += bucket
+                    bucket_labels = _label_text({**labels, "le": _number(bound)})
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_label_text(labels)} {_number(total)}")
+                lines.append(f"{self.name}_count{_label_text(labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+        # Called at render time for values kept elsewhere, such as cache counters
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def gauge_lines(name: str, help: str, kind: str, values: Dict[Tuple[Tuple[str, str], ...], float]) -> List[str]:
+    """Render values owned by another object as a counter or gauge."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in values.items():
+        lines.append(f"{name}{_label_text(dict(labels))} {_number(value)}")
+    return lines
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rankings_stage_seconds", "Time spent in each stage of each source", ("source", "stage"))
+STAGE_FAILURES = REGISTRY.counter(
+    "rankings_stage_failures_total", "Stages that raised", ("source", "stage"))
+ROWS = REGISTRY.counter("rankings_rows_total", "Rows produced by parsing", ("source",))
+PAYLOAD_BYTES = REGISTRY.counter("rankings_payload_bytes_total", "Bytes downloaded", ("source",))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "rankings_http_request_seconds", "Time to serve each web request", ("endpoint",))
+RESPONSES = REGISTRY.counter("rankings_http_responses_total", "Web responses sent", ("endpoint", "status"))
+
+
+@contextmanager
+def stage(name: str, source: Optional[str] = None):
+    """
+    Time one stage of a source's work, counting it as a failure if it raises.
+
+    The source defaults to the one whose stage encloses this one, so helpers
+    such as name standardization are attributed without being told. With
+    profiling enabled the stage is also captured, see profiling.py.
+    """
+    source = source or current_source.get() or "unknown"
+    token = current_source.set(source)
+    start = time.perf_counter()
+    try:
+        with profiled(source, name):
+            yield
+    except Exception:
+        STAGE_FAILURES.inc(source=source, stage=name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, source=source, stage=name)
+        current_source.reset(token)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int, host: str = '') -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread, for processes without the web app."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+
+def summary_table() -> str:
+    """Per source and stage: calls, failures, total, p50, p95 and max time, plus rows and bytes."""
+    header = f"{'source':<10}{'stage':<13}{'calls':>6}{'fail':>5}{'total s':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}"
+    lines = [header, "-" * len(header)]
+    for (source, name), (_, total, count, maximum) in sorted(STAGE_SECONDS.series.items()):
+        lines.append(
+            f"{source:<10}{name:<13}{count:>6}{int(STAGE_FAILURES.value(source=source, stage=name)):>5}"
+            f"{total:>9.2f}{STAGE_SECONDS.quantile(0.5, source=source, stage=name) * 1000:>9.1f}"
+            f"{STAGE_SECONDS.quantile(0.95, source=source, stage=name) * 1000:>9.1f}{maximum * 1000:>9.1f}"
+        )
+    sources = sorted(set(source for (source,) in ROWS.values) | set(source for (source,) in PAYLOAD_BYTES.values))
+    if sources:
+        lines += ["", f"{'source':<10}{'rows':>8}{'KiB':>10}"]
+        for source in sources:
+            lines.append(f"{source:<10}{int(ROWS.value(source=source)):>8}"
+                         f"{PAYLOAD_BYTES.value(source=source) / 1024:>10.1f}")
+    return "\n".join(lines)
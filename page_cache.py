@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Page Cache
+Pages rendered once per snapshot version and kept compressed in memory
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Pages are still offered gzip-compressed and uncompressed
+    brotli = None
+
+# Preferred first when a client accepts several
+ENCODINGS = ("br", "gzip")
+
+
+@dataclass
+class RenderedPage:
+    body: bytes
+    etag: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def from_text(cls, text: str) -> "RenderedPage":
+        body = text.encode('utf-8')
+        # Content hash, so every worker and restart agrees on the tag
+        page = cls(body, hashlib.sha256(body).hexdigest()[:32])
+        # mtime=0 keeps the gzip bytes identical for identical pages
+        page.encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            page.encoded["br"] = brotli.compress(body, quality=11)
+        return page
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong validator of one content coding; each encoded body gets its own."""
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+
+    def negotiate(self, accepted: Iterable[str]) -> Tuple[bytes, Optional[str]]:
+        """Return (body, Content-Encoding) for the encodings a client accepts."""
+        accepted = set(accepted)
+        for encoding in ENCODINGS:
+            if encoding in accepted and encoding in self.encoded:
+                return self.encoded[encoding], encoding
+        return self.body, None
+
+
+class PageCache:
+    def __init__(self, max_pages: int = 256):
+        """
+        Args:
+            max_pages (int): Rendered pages kept, least recently used dropped first
+        """
+        self.max_pages = max_pages
+        self._pages: "OrderedDict[Hashable, Tuple[Hashable, RenderedPage]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self.renders = 0
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _lookup(self, key: Hashable, version: Hashable) -> Optional[RenderedPage]:
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._pages.move_to_end(key)
+            return entry[1]
+
+    def get(self, key: Hashable, version: Hashable, render: Callable[[], str]) -> RenderedPage:
+        """
+        Return the page for a key at a data version, rendering it only once.
+
+        A new version replaces the key's previous page.
+        """
+        page = self._lookup(key, version)
+        if page is not None:
+            return page
+
+        with self._key_lock(key):
+            page = self._lookup(key, version)
+            if page is not None:
+                return page
+            page = RenderedPage.from_text(render())
+            with self._lock:
+                self.renders += 1
+                self._pages[key] = (version, page)
+                self._pages.move_to_end(key)
+                while len(self._pages) > self.max_pages:
+                    evicted, _ = self._pages.popitem(last=False)
+                    self._key_locks.pop(evicted, None)
+            return page
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiling
+On-demand cProfile capture, one pstats file per source and stage
+
+Run with a profile directory to list the hot functions of every capture:
+    python profiling.py results/profiles/<run>
+The .pstats files also open as flame graphs in snakeviz or flameprof.
+"""
+
+import argparse
+import cProfile
+import glob
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+PROFILE_DIR = os.environ.get('RANKINGS_PROFILE_DIR', 'results/profiles')
+
+# Set while a block is being profiled in this thread; nested stages are part of its profile
+_active = threading.local()
+
+
+class Profiler:
+    def __init__(self, root: str = PROFILE_DIR, run: Optional[str] = None):
+        """
+        Args:
+            root (str): Directory holding one subdirectory per profiled run
+            run (str): Name of this run's subdirectory, a timestamp by default
+        """
+        self.path = os.path.join(root, run or time.strftime('%Y%m%d-%H%M%S'))
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._lock = threading.Lock()
+        self.skipped = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def artifact(self, source: str, stage: str) -> str:
+        return os.path.join(self.path, f"{source}-{stage}.pstats")
+
+    @contextmanager
+    def profile(self, source: str, stage: str):
+        """
+        Profile a block into <source>-<stage>.pstats, adding to earlier captures of it.
+
+        Blocks nested inside a profiled block in the same thread run
+        unprofiled; their calls already appear in the enclosing profile.
+        """
+        if getattr(_active, 'profiling', False):
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; concurrent stages go uncaptured
+            self.skipped += 1
+            yield
+            return
+        _active.profiling = True
+        try:
+            yield
+        finally:
+            profile.disable()
+            _active.profiling = False
+            self._save(source, stage, profile)
+
+    def _save(self, source: str, stage: str, profile: cProfile.Profile):
+        path = self.artifact(source, stage)
+        with self._lock:
+            stats = self._stats.get(path)
+            if stats is None:
+                stats = self._stats[path] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+            stats.dump_stats(path)
+
+
+_profiler: Optional[Profiler] = None
+
+
+def enable_profiling(root: Optional[str] = None, run: Optional[str] = None) -> Profiler:
+    """Profile every pipeline stage in this process from now on."""
+    global _profiler
+    _profiler = Profiler(root or PROFILE_DIR, run)
+    return _profiler
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+@contextmanager
+def profiled(source: str, stage: str):
+    """Profile a block when profiling is enabled; otherwise just run it."""
+    if _profiler is None:
+        yield
+        return
+    with _profiler.profile(source, stage):
+        yield
+
+
+def report(path: str, limit: int = 15, sort: str = 'cumulative'):
+    """Print the hottest functions of each capture in a run directory (or of one file)."""
+    paths = sorted(glob.glob(os.path.join(path, '*.pstats'))) if os.path.isdir(path) else [path]
+    if not paths:
+        print(f"No profiles in {path}")
+    for artifact in paths:
+        print(f"\n=== {os.path.basename(artifact)} ===")
+        pstats.Stats(artifact).strip_dirs().sort_stats(sort).print_stats(limit)
+
+
+def main():
+    args = argparse.ArgumentParser(description="Show the hot functions of profiled stages.")
+    args.add_argument("path", help="a run directory under results/profiles, or one .pstats file")
+    args.add_argument("--limit", type=int, default=15, help="functions listed per capture")
+    args.add_argument("--sort", default="cumulative", help="pstats sort key, e.g. tottime")
+    options = args.parse_args()
+    report(options.path, options.limit, options.sort)
+
+
+if __name__ == "__main__":
+    main()
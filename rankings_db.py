@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rankings Database
+Indexed SQLite store written by the pipeline and read by the web app
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from schema import rank_column
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    conference TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_teams_conference ON teams (conference);
+
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources (id),
+    fetched_at TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    dtypes TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_source ON snapshots (source_id, id);
+
+CREATE TABLE IF NOT EXISTS rankings (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    source_id INTEGER NOT NULL REFERENCES sources (id),
+    team_id INTEGER NOT NULL REFERENCES teams (id),
+    date TEXT NOT NULL,
+    rank INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (snapshot_id, team_id)
+);
+CREATE INDEX IF NOT EXISTS idx_rankings_team_date ON rankings (team_id, date);
+CREATE INDEX IF NOT EXISTS idx_rankings_source_rank ON rankings (source_id, snapshot_id, rank);
+"""
+
+# Column holding each team's conference, used to fill teams.conference
+CONFERENCE_COLUMN = "KP Conference"
+
+
+def _to_json_value(value):
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+
+class RankingsDB:
+    def __init__(self, path: str = os.environ.get('RANKINGS_DB', 'results/rankings.db')):
+        """
+        Args:
+            path (str): SQLite database file, created on first use
+        """
+        self.path = path
+        self._local = threading.local()
+        # The schema is created by the first connection, so constructing this (say in a
+        # preloaded gunicorn master) opens nothing that a fork could carry into workers
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run while the pipeline writes."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    with conn:
+                        conn.executescript(SCHEMA_SQL)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def _id_for(self, conn: sqlite3.Connection, table: str, name: str) -> int:
+        conn.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+        return conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+
+    def write_snapshot(self, source: str, df: pd.DataFrame, fetched_at: Optional[datetime] = None) -> int:
+        """
+        Store one parsed frame as a new snapshot in a single transaction.
+
+        Returns:
+            int: The snapshot ID
+        """
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        columns = [column for column in df.columns if column != "Team"]
+        dtypes = {column: str(df[column].dtype) for column in columns}
+        rank = rank_column(source)
+
+        conn = self._connection()
+        with conn:
+            source_id = self._id_for(conn, "sources", source)
+            cursor = conn.execute(
+                "INSERT INTO snapshots (source_id, fetched_at, columns, dtypes) VALUES (?, ?, ?, ?)",
+                (source_id, fetched_at.isoformat(), json.dumps(columns), json.dumps(dtypes))
+            )
+            snapshot_id = cursor.lastrowid
+
+            team_ids = {team: self._id_for(conn, "teams", team) for team in df["Team"].dropna().unique()}
+            if CONFERENCE_COLUMN in df.columns:
+                conn.executemany(
+                    "UPDATE teams SET conference = ? WHERE id = ?",
+                    [(str(conference), team_ids[team])
+                     for team, conference in zip(df["Team"], df[CONFERENCE_COLUMN])
+                     if team in team_ids and not pd.isna(conference)]
+                )
+
+            date = fetched_at.strftime('%Y-%m-%d')
+            rows = []
+            for record in df.to_dict('records'):
+                team = record.pop("Team")
+                if team not in team_ids:
+                    continue
+                data = {column: _to_json_value(record[column]) for column in columns}
+                rows.append((snapshot_id, source_id, team_ids[team], date,
+                             data.get(rank) if rank else None, json.dumps(data)))
+            # A team listed twice keeps its first row
+            conn.executemany(
+                "INSERT OR IGNORE INTO rankings (snapshot_id, source_id, team_id, date, rank, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+        return snapshot_id
+
+    def latest_snapshot(self, source: str) -> Optional[tuple]:
+        """(id, source ID, fetched_at, columns, dtypes) of a source's newest snapshot."""
+        return self._connection().execute(
+            "SELECT s.id, s.source_id, s.fetched_at, s.columns, s.dtypes FROM snapshots s "
+            "JOIN sources src ON src.id = s.source_id WHERE src.name = ? "
+            "ORDER BY s.id DESC LIMIT 1", (source,)
+        ).fetchone()
+
+    def _frame(self, rows: List[tuple], columns: List[str], dtypes: Dict[str, str],
+               extra: Optional[List[str]] = None) -> pd.DataFrame:
+        extra = extra or []
+        records = []
+        for row in rows:
+            data = json.loads(row[-1])
+            records.append(list(row[:-1]) + [data.get(column) for column in columns])
+        df = pd.DataFrame(records, columns=extra + ["Team"] + columns)
+        for column, dtype in dtypes.items():
+            if column in df.columns and dtype in ('Int16', 'float32', 'category'):
+                df[column] = df[column].astype(dtype)
+        return df
+
+    def latest(self, source: str, limit: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """The newest snapshot of a source ordered by rank, or None if there is none."""
+        snapshot = self.latest_snapshot(source)
+        if snapshot is None:
+            return None
+        snapshot_id, source_id, _, columns, dtypes = snapshot
+        # Served in rank order straight from the (source, snapshot, rank) index
+        query = ("SELECT t.name, r.data FROM rankings r JOIN teams t ON t.id = r.team_id "
+                 "WHERE r.source_id = ? AND r.snapshot_id = ? ORDER BY r.rank")
+        params = [source_id, snapshot_id]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self._connection().execute(query, params).fetchall()
+        return self._frame(rows, json.loads(columns), json.loads(dtypes))
+
+    def team_history(self, team: str, source: str) -> pd.DataFrame:
+        """Every stored row for one team in one source, oldest first."""
+        snapshot = self.latest_snapshot(source)
+        if snapshot is None:
+            return pd.DataFrame()
+        columns, dtypes = json.loads(snapshot[3]), json.loads(snapshot[4])
+        rows = self._connection().execute(
+            "SELECT s.fetched_at, t.name, r.data FROM teams t "
+            "JOIN rankings r ON r.team_id = t.id "
+            "JOIN snapshots s ON s.id = r.snapshot_id "
+            "WHERE t.name = ? AND r.source_id = ? ORDER BY r.date, s.id", (team, snapshot[1])
+        ).fetchall()
+        return self._frame(rows, columns, dtypes, extra=["Fetched At"])
+
+    def conferences(self) -> List[str]:
+        return [row[0] for row in self._connection().execute(
+            "SELECT DISTINCT conference FROM teams WHERE conference IS NOT NULL ORDER BY conference"
+        )]
+
+    def conference(self, conference: str, source: str) -> pd.DataFrame:
+        """A conference's teams in the newest snapshot of a source, ordered by rank."""
+        snapshot = self.latest_snapshot(source)
+        if snapshot is None:
+            return pd.DataFrame()
+        snapshot_id, _, _, columns, dtypes = snapshot
+        # CROSS JOIN fixes the order: the conference index picks the teams, then
+        # the primary key finds each one's row
+        rows = self._connection().execute(
+            "SELECT t.name, r.data FROM teams t CROSS JOIN rankings r "
+            "ON r.snapshot_id = ? AND r.team_id = t.id "
+            "WHERE t.conference = ? ORDER BY r.rank", (snapshot_id, conference)
+        ).fetchall()
+        return self._frame(rows, json.loads(columns), json.loads(dtypes))
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rate Limiting
+Per-host token buckets that queue requests and honour Retry-After
+"""
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from fetch_policy import BudgetExceededError
+
+# (requests per second, burst) for hosts we know; other hosts get RANKINGS_HOST_RATE
+HOST_LIMITS: Dict[str, Tuple[float, int]] = {
+    # RPI and SOS both come from here
+    "www.teamrankings.com": (0.5, 1),
+    "site.web.api.espn.com": (5, 8),
+}
+DEFAULT_RATE = float(os.environ.get('RANKINGS_HOST_RATE', 2))
+DEFAULT_BURST = int(os.environ.get('RANKINGS_HOST_BURST', 4))
+
+# Pause when a 429 arrives without a usable Retry-After
+DEFAULT_RETRY_AFTER = 30
+# Longest Retry-After honoured, so a hostile or broken header can't park a host for hours
+MAX_RETRY_AFTER = float(os.environ.get('RANKINGS_MAX_RETRY_AFTER', 300))
+# Throttled responses a single request waits out before giving up
+MAX_THROTTLED_RETRIES = 5
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate (float): Tokens added per second
+            burst (int): Most tokens held at once, i.e. requests sent back to back
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take the next slot and return how many seconds to wait for it.
+
+        Tokens may go negative: each caller books the slot after the
+        previous one, so waiting requests are served in arrival order
+        instead of being rejected.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._blocked_until)
+            if start > self._last:
+                self._tokens = min(self.burst, self._tokens + (start - self._last) * self.rate)
+                self._last = start
+            self._tokens -= 1
+            wait = self._last - now
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return max(0.0, wait)
+
+    def cancel(self):
+        """Give back a reservation that won't be used."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def pause(self, seconds: float):
+        """Send nothing for the given time, then resume without a burst."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._blocked_until:
+                self._blocked_until = until
+                self._last = until
+                self._tokens = min(self._tokens, 0.0)
+
+
+class HostRateLimiter:
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default_rate: float = DEFAULT_RATE, default_burst: int = DEFAULT_BURST):
+        """
+        Args:
+            limits (dict): Host to (requests per second, burst)
+            default_rate (float): Requests per second for other hosts
+            default_burst (int): Burst for other hosts
+        """
+        self.limits = dict(HOST_LIMITS if limits is None else limits)
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self.limits.get(host, (self.default_rate, self.default_burst))
+                bucket = self._buckets[host] = TokenBucket(rate, burst)
+            return bucket
+
+    def _reserve(self, url: str, deadline: Optional[float]) -> float:
+        bucket = self.bucket(url)
+        delay = bucket.reserve()
+        if deadline is not None and time.monotonic() + delay > deadline:
+            bucket.cancel()
+            raise BudgetExceededError(
+                f"{urlsplit(url).netloc} has no free slot before the deadline (next in {delay:.1f}s)")
+        return delay
+
+    def wait(self, url: str, deadline: Optional[float] = None):
+        """
+        Block until the URL's host has a free slot.
+
+        Raises:
+            BudgetExceededError: The slot would come after the monotonic deadline;
+                nothing is waited for and the slot is given back
+        """
+        delay = self._reserve(url, deadline)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str, deadline: Optional[float] = None):
+        """Like wait(), without blocking the event loop."""
+        delay = self._reserve(url, deadline)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def throttle(self, url: str, retry_after: Optional[str]) -> float:
+        """
+        Pause a host after it answered 429.
+
+        Returns:
+            float: Seconds the host is paused for, at most MAX_RETRY_AFTER
+        """
+        seconds = parse_retry_after(retry_after)
+        if seconds is None:
+            seconds = DEFAULT_RETRY_AFTER
+        seconds = min(seconds, MAX_RETRY_AFTER)
+        self.bucket(url).pause(seconds)
+        with self._lock:
+            self.throttled += 1
+        return seconds
+
+
+_shared_limiter: Optional[HostRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Return the process-wide limiter shared by every client."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = HostRateLimiter()
+        return _shared_limiter
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Refresh Scheduler
+Refreshes each source on its own cadence, with jitter and failure backoff
+"""
+
+import heapq
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+
+# Seconds between successful refreshes; RANKINGS_REFRESH_<SOURCE> overrides one
+DEFAULT_INTERVALS = {
+    "kenpom": 900,
+    "ncaa": 3600,
+    "rpi": 3600,
+    "sos": 3600,
+    "espn": 3600
+}
+
+
+def intervals_from_env(sources) -> Dict[str, float]:
+    return {
+        source: float(os.environ.get(f'RANKINGS_REFRESH_{source.upper()}', DEFAULT_INTERVALS.get(source, 3600)))
+        for source in sources
+    }
+
+
+@dataclass
+class SourceState:
+    interval: float
+    next_run: float = 0.0
+    running: bool = False
+    failures: int = 0
+    last_success: Optional[float] = None
+    last_error: Optional[str] = None
+    last_duration: Optional[float] = None
+
+
+class RefreshScheduler:
+    def __init__(self, loaders: Dict[str, Callable[[], pd.DataFrame]],
+                 on_refresh: Callable[[str, pd.DataFrame], None],
+                 intervals: Optional[Dict[str, float]] = None, jitter: float = 0.1,
+                 retry_delay: float = 60, max_backoff: float = 3600, max_workers: int = 2):
+        """
+        Args:
+            loaders (dict): Source name to a function returning its rankings
+            on_refresh (callable): Called with (source, frame) after each successful refresh
+            intervals (dict): Seconds between refreshes per source
+            jitter (float): Fraction each delay is randomly stretched or shrunk by,
+                so sources don't hit upstream in lockstep
+            retry_delay (float): First delay after a failure, doubled per further failure
+            max_backoff (float): Longest delay after repeated failures
+            max_workers (int): Sources refreshed at the same time
+        """
+        self.loaders = loaders
+        self.on_refresh = on_refresh
+        intervals = intervals or intervals_from_env(loaders)
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+        self.max_workers = max_workers
+        self.states = {source: SourceState(intervals[source]) for source in loaders}
+        self._queue: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def _jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _schedule(self, source: str, delay: float):
+        with self._lock:
+            state = self.states[source]
+            state.next_run = time.time() + self._jittered(delay)
+            heapq.heappush(self._queue, (state.next_run, source))
+        self._wake.set()
+
+    def start(self, initial_delay: float = 0) -> "RefreshScheduler":
+        """Start refreshing in the background; every source first runs after initial_delay."""
+        if self._thread is not None:
+            return self
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="refresh")
+        for source in self.states:
+            self._schedule(source, initial_delay)
+        self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait: bool = True):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.clear()
+            with self._lock:
+                now = time.time()
+                due = []
+                while self._queue and self._queue[0][0] <= now:
+                    _, source = heapq.heappop(self._queue)
+                    if not self.states[source].running:
+                        self.states[source].running = True
+                        due.append(source)
+                timeout = self._queue[0][0] - now if self._queue else None
+            for source in due:
+                self._executor.submit(self._refresh, source)
+            self._wake.wait(timeout)
+
+    def _refresh(self, source: str):
+        state = self.states[source]
+        started = time.time()
+        try:
+            df = self.loaders[source]()
+            if df is None or df.empty:
+                raise ValueError("no rows returned")
+            self.on_refresh(source, df)
+        except Exception as e:
+            with self._lock:
+                state.failures += 1
+                state.last_error = str(e)
+                state.last_duration = time.time() - started
+                state.running = False
+                delay = min(self.retry_delay * 2 ** (state.failures - 1), self.max_backoff)
+            print(f"Refreshing {source} failed ({e}); retrying in about {delay:.0f}s")
+            self._schedule(source, delay)
+            return
+
+        with self._lock:
+            state.failures = 0
+            state.last_error = None
+            state.last_success = time.time()
+            state.last_duration = state.last_success - started
+            state.running = False
+        self._schedule(source, state.interval)
+
+    def status(self) -> Dict[str, dict]:
+        """Cadence, next run and last outcome of every source."""
+        with self._lock:
+            return {
+                source: {
+                    'interval': state.interval,
+                    'next_run_in': round(max(0.0, state.next_run - time.time()), 1),
+                    'running': state.running,
+                    'failures': state.failures,
+                    'last_success': state.last_success,
+                    'last_error': state.last_error,
+                    'last_duration': state.last_duration
+                }
+                for source, state in self.states.items()
+            }
+
+
+def main():
+    """Run the scheduler as the single process that refreshes data for the web workers."""
+    from main import BasketballRankingsParser
+    from combine import combine_rankings
+    from rankings_db import RankingsDB
+    from shared_snapshot import SharedSnapshot
+    from metrics import REGISTRY, gauge_lines, serve_metrics, stage
+
+    parser = BasketballRankingsParser()
+    db = RankingsDB()
+    shared = SharedSnapshot()
+    loaders = {
+        "kenpom": parser.get_kenpom_rankings,
+        "ncaa": parser.get_ncaa_rankings,
+        "rpi": parser.get_rpi_rankings,
+        "sos": parser.get_sos_rankings,
+        "espn": parser.get_espn_rankings
+    }
+    # The combined table is rebuilt from the newest frame of every source,
+    # starting from what was published before this process started
+    latest: Dict[str, pd.DataFrame] = {}
+    for source in loaders:
+        df = shared.read(source)
+        if df is None:
+            df = db.latest(source)
+        if df is not None:
+            latest[source] = df
+    publish_lock = threading.Lock()
+
+    def on_refresh(source: str, df: pd.DataFrame):
+        db.write_snapshot(source, df)
+        with publish_lock:
+            latest[source] = df
+            with stage("combine", "combined"):
+                combined = combine_rankings({name: latest[name] for name in loaders if name in latest})
+            version = shared.publish({source: df}, combined=combined)
+        print(f"Published {source} ({len(df)} teams) as snapshot {version}")
+
+    scheduler = RefreshScheduler(loaders, on_refresh)
+
+    def scheduler_metrics():
+        status = scheduler.status()
+        return gauge_lines(
+            "rankings_refresh_consecutive_failures", "Failed refreshes in a row per source", "gauge",
+            {(("source", source),): state['failures'] for source, state in status.items()}
+        ) + gauge_lines(
+            "rankings_refresh_last_success_timestamp_seconds", "Unix time of each source's last refresh", "gauge",
+            {(("source", source),): state['last_success'] for source, state in status.items()
+             if state['last_success'] is not None}
+        )
+
+    # All scraping happens in this process, so its stage timings are served here,
+    # not by the web workers' /metrics
+    REGISTRY.register_collector(scheduler_metrics)
+    port = int(os.environ.get('RANKINGS_METRICS_PORT', 9108))
+    serve_metrics(port)
+    print(f"Serving scheduler metrics on :{port}/metrics")
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop(wait=False)
+
+
+if __name__ == "__main__":
+    main()
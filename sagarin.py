@@ -1,16 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import requests
 import pandas as pd
 import re
-from typing import Optional, Dict
+from typing import Dict, Iterable, Optional
 import os
+from http_session import get_session
+from fetch_policy import get_policy
+from schema import apply_schema
+
+# Conference headings that share the "rank name = rating" layout of team lines
+CONFERENCE_PREFIXES = (
+    'ACC', 'BIG TEN', 'WEST COAST', 'CONFERENCE USA', 'MISSOURI VALLEY', 'SOUTHWESTERN',
+    'BIG WEST', 'ATLANTIC SUN', 'HORIZON', 'NORTHEAST', 'INDEPENDENTS', 'MOUNTAIN WEST',
+    'ATLANTIC COAST', 'SOUTHLAND', 'OHIO VALLEY', 'IVY LEAGUE', 'WESTERN ATHLETIC', 'SOUTHERN',
+    'BIG SKY', 'METRO ATLANTIC', 'BIG SOUTH', 'COLONIAL', 'SUMMIT LEAGUE', 'AMERICA EAST',
+    'PATRIOT', 'SOUTHEASTERN', 'BIG EAST', 'BIG 12', 'SEC', 'PAC 12', 'AAC', 'MWC',
+    'WCC', 'MVC', 'CAA', 'CUSA', 'MAC', 'SUN BELT', 'WAC'
+)
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+NOTE_PATTERN = re.compile(r'\[.*?\]')
+AMER_ATHLETIC_PATTERN = re.compile(r'AMER. ATHLETIC')
+
 
 class BasketballRankingsParser:
     def __init__(self):
-        # Updated pattern to exclude conference entries
+        # Rank, team and rating in one match; conference headings are rejected
+        # afterwards with a single startswith() instead of a regex lookahead
         self.team_pattern = re.compile(
-            r'^\s*(\d+)\s+(?!ACC|BIG TEN|WEST COAST|CONFERENCE USA|MISSOURI VALLEY|SOUTHWESTERN|BIG WEST|ATLANTIC SUN|HORIZON|NORTHEAST|INDEPENDENTS|MOUNTAIN WEST|ATLANTIC COAST|SOUTHLAND|OHIO VALLEY|IVY LEAGUE|WESTERN ATHLETIC|SOUTHERN|BIG SKY|METRO ATLANTIC|BIG SOUTH|COLONIAL|SUMMIT LEAGUE|AMERICA EAST|PATRIOT|AMER. ATHLETIC|SOUTHEASTERN|BIG EAST|BIG 12|SEC|PAC 12|AAC|MWC|WCC|MVC|CAA|CUSA|MAC|SUN BELT|WAC)([A-Za-z][A-Za-z. \'\-&()]+?)\s+=?\s+([\d.]+)'
+            r'^\s*(\d+)\s+([A-Za-z][A-Za-z. \'\-&()]+?)\s+=?\s+([\d.]+)'
         )
         
         # Define known conference names for filtering
@@ -19,21 +37,34 @@ class BasketballRankingsParser:
             'AAC', 'MWC', 'WCC', 'MVC', 'CAA', 'CUSA', 'MAC',
             'SUN BELT', 'WAC'
         }
+        self._conference_names = frozenset(conf.upper() for conf in self.conferences)
+
+        # Last parsed frame per URL, reused when the server answers 304
+        self._parsed: Dict[str, pd.DataFrame] = {}
 
     def is_conference(self, name: str) -> bool:
         """Check if the given name is a conference name."""
-        return name.strip().upper() in {conf.upper() for conf in self.conferences}
+        return name.strip().upper() in self._conference_names
 
     def clean_text(self, text: str) -> str:
         """Remove HTML tags and clean up the text."""
-        clean = re.sub(r'<[^>]+>', '', text)
-        clean = re.sub(r'\[.*?\]', '', clean)
-        return clean.strip()
+        # Most lines carry neither, so skip the regex engine entirely for them
+        if '<' in text:
+            text = TAG_PATTERN.sub('', text)
+        if '[' in text:
+            text = NOTE_PATTERN.sub('', text)
+        return text.strip()
+
+    def is_conference_heading(self, name: str) -> bool:
+        """Check if a matched name starts with a conference heading."""
+        return name.startswith(CONFERENCE_PREFIXES) or (
+            name.startswith('AMER') and AMER_ATHLETIC_PATTERN.match(name) is not None
+        )
 
     def parse_team_line(self, line: str) -> Optional[Dict]:
         """Parse a team entry line for rank, team, and rating only."""
         match = self.team_pattern.match(line)
-        if match:
+        if match and not self.is_conference_heading(match.group(2)):
             team_name = match.group(2).strip()
             # Double-check that it's not a conference name
             if not self.is_conference(team_name):
@@ -44,35 +75,73 @@ class BasketballRankingsParser:
                 }
         return None
 
-    def parse_rankings(self, url: str) -> Optional[pd.DataFrame]:
+    def parse_lines(self, lines: Iterable[str], stop_early: bool = True) -> Optional[pd.DataFrame]:
+        """
+        Parse team lines from an iterable of raw page lines in a single pass.
+
+        Args:
+            lines (iterable): Page lines, consumed lazily
+            stop_early (bool): Stop at the end of the ratings block, detected
+                when a rank-numbered line goes back below the previous team's rank;
+                repeated ranks (ties, or a conference line sharing a rank) continue
+
+        Returns:
+            DataFrame: Rank, Team and Rating sorted by rank, or None if no teams were found
+        """
+        teams_data = []
+        seen_teams = set()
+        last_rank = 0
+
+        for line in lines:
+            line = self.clean_text(line)
+            if not line or '_' in line or 'FINAL' in line:
+                continue
+
+            match = self.team_pattern.match(line)
+            if match is None:
+                continue
+            rank = int(match.group(1))
+            if stop_early and teams_data and rank < last_rank:
+                # Ranks restarted: we are past the ratings into conference listings
+                break
+            if self.is_conference_heading(match.group(2)):
+                continue
+
+            team_name = match.group(2).strip()
+            if team_name not in seen_teams and not self.is_conference(team_name):
+                teams_data.append({
+                    'Rank': rank,
+                    'Team': team_name,
+                    'Rating': float(match.group(3))
+                })
+                seen_teams.add(team_name)
+                last_rank = rank
+
+        if not teams_data:
+            return None
+        teams_df = apply_schema(pd.DataFrame(teams_data), "sagarin")
+        return teams_df.sort_values('Rank').reset_index(drop=True)
+
+    def parse_rankings(self, url: str, stop_early: bool = True) -> Optional[pd.DataFrame]:
         """Parse basketball rankings from the given URL."""
         headers = {'User-Agent': 'Mozilla/5.0'}
         
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            
-            lines = response.text.splitlines()
-            cleaned_lines = [self.clean_text(line) for line in lines]
-            
-            teams_data = []
-            seen_teams = set()
-            
-            for line in cleaned_lines:
-                if not line.strip() or '_' in line or 'FINAL' in line:
-                    continue
-                
-                team_data = self.parse_team_line(line)
-                if team_data:
-                    team_name = team_data['Team']
-                    if team_name not in seen_teams:
-                        teams_data.append(team_data)
-                        seen_teams.add(team_name)
+            response = get_session().get(url, headers=headers, stream=True, policy=get_policy("sagarin"))
+            # Every exit below releases the streamed connection back to the pool
+            with response:
+                response.raise_for_status()
+                if response.not_modified and url in self._parsed:
+                    # Page unchanged since the last fetch; reuse the last parse
+                    return self._parsed[url].copy()
+
+                # Lines are decoded and parsed as they arrive; stopping early
+                # leaves the rest of the page undownloaded
+                teams_df = self.parse_lines(response.iter_lines(decode_unicode=True), stop_early)
             
             # Create DataFrame
-            if teams_data:
-                teams_df = pd.DataFrame(teams_data)
-                teams_df = teams_df.sort_values('Rank').reset_index(drop=True)
+            if teams_df is not None:
+                self._parsed[url] = teams_df
                 
                 # Print summary
                 print(f"\nTotal teams processed: {len(teams_df)}")
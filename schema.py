@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ranking Schemas
+Declared per-source column types, applied once when a page is parsed
+"""
+
+from typing import Dict, Optional
+import pandas as pd
+
+RANK = "rank"          # compact nullable integer
+RATING = "rating"      # float32
+RECORD = "record"      # "W-L" text split into integer win and loss columns
+CATEGORY = "category"  # low-cardinality labels such as conferences
+
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    "kenpom": {
+        "KP Rank": RANK, "KP Conference": CATEGORY, "Win Loss": RECORD, "KP Net Rtg": RATING
+    },
+    "ncaa": {
+        "NCAA Rank": RANK, "Road": RECORD, "Neutral": RECORD, "Home": RECORD,
+        "Quad1": RECORD, "Quad2": RECORD, "Quad3": RECORD, "Quad4": RECORD
+    },
+    "rpi": {"RPI Rank": RANK, "RPI Rating": RATING},
+    "sos": {"SOS Rank": RANK, "SOS Rating": RATING},
+    "espn": {"BPI Rating": RATING, "BPI Rank": RANK},
+    "sagarin": {"Rank": RANK, "Rating": RATING}
+}
+
+# Names for the win and loss halves of a record column; others get " W" / " L"
+RECORD_NAMES = {"Win Loss": ("Wins", "Losses")}
+
+
+def record_columns(column: str):
+    """Return the (wins, losses) column names a record column is split into."""
+    return RECORD_NAMES.get(column, (f"{column} W", f"{column} L"))
+
+
+def rank_column(source: str) -> Optional[str]:
+    """Return the first rank column declared for a source."""
+    for column, kind in SCHEMAS.get(source, {}).items():
+        if kind == RANK:
+            return column
+    return None
+
+
+def parse_ranks(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values, errors='coerce').astype('Int16')
+
+
+def parse_ratings(values: pd.Series) -> pd.Series:
+    # Unparseable placeholders such as "--" become NaN
+    return pd.to_numeric(values, errors='coerce').astype('float32')
+
+
+def parse_records(values: pd.Series) -> pd.DataFrame:
+    parts = values.astype('string').str.extract(r'^\s*(\d+)\s*-\s*(\d+)\s*$')
+    return parts.apply(lambda part: pd.to_numeric(part, errors='coerce')).astype('Int16')
+
+
+def apply_schema(df: pd.DataFrame, source: str) -> pd.DataFrame:
+    """
+    Convert a freshly parsed, all-text frame to the source's declared types.
+
+    Columns not named in the schema are left untouched. Record columns are
+    replaced, in place, by their win and loss columns.
+
+    Args:
+        df (DataFrame): Parsed rankings with text columns
+        source (str): Key into SCHEMAS
+
+    Returns:
+        DataFrame: A new frame with typed columns
+    """
+    schema = SCHEMAS[source]
+    columns = {}
+    for column in df.columns:
+        kind = schema.get(column)
+        values = df[column]
+        if kind == RANK:
+            columns[column] = parse_ranks(values)
+        elif kind == RATING:
+            columns[column] = parse_ratings(values)
+        elif kind == CATEGORY:
+            columns[column] = values.astype('category')
+        elif kind == RECORD:
+            wins, losses = record_columns(column)
+            parts = parse_records(values)
+            columns[wins] = parts[0]
+            columns[losses] = parts[1]
+        else:
+            columns[column] = values
+    return pd.DataFrame(columns, index=df.index)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared Snapshot
+Read-only Arrow IPC snapshot published once and read by every web worker
+
+Files are memory-mapped for reading and converted to pandas without copying:
+string columns stay Arrow-backed and numeric columns are read-only views of
+the mapped buffers, so every worker serving a version shares the same pages
+of the OS page cache instead of holding its own copy.
+"""
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+COMBINED = "combined"
+CURRENT = "CURRENT"
+MANIFEST = "manifest.json"
+
+
+class SharedSnapshot:
+    def __init__(self, root: str = os.environ.get('RANKINGS_SHARED_DIR', 'results/shared'), keep: int = 3):
+        """
+        Args:
+            root (str): Directory holding versions/<version>/ and the CURRENT pointer
+            keep (int): Published versions kept on disk; older ones are removed
+        """
+        if pa is None:
+            raise ImportError("The shared snapshot requires the pyarrow package")
+        self.root = root
+        self.keep = keep
+        self._versions_dir = os.path.join(root, "versions")
+        self._current_path = os.path.join(root, CURRENT)
+        # Per-process memo of the frames read for the current version, with the
+        # mapped tables their columns point into
+        self._frames: Dict[str, Tuple[str, pd.DataFrame, 'pa.Table']] = {}
+        self._manifests: Dict[str, dict] = {}
+        self._pointer: Tuple[Optional[int], Optional[str]] = (None, None)
+        self._lock = threading.Lock()
+
+    def _version_dir(self, version: str) -> str:
+        return os.path.join(self._versions_dir, version)
+
+    def _frame_path(self, version: str, name: str) -> str:
+        return os.path.join(self._version_dir(version), f"{name}.arrow")
+
+    def publish(self, frames: Dict[str, pd.DataFrame], combined: Optional[pd.DataFrame] = None) -> str:
+        """
+        Write a new version and switch every reader to it at once.
+
+        Sources not given, or given as empty frames, are carried over from
+        the current version, so a single refreshed source can be published
+        on its own and a failed fetch never replaces good data. The combined
+        table is carried over the same way when it is None or empty.
+
+        Returns:
+            str: The published version
+        """
+        previous = self.current_version()
+        version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}"
+        tmp_dir = self._version_dir(f".{version}.tmp")
+        os.makedirs(tmp_dir)
+
+        sources = [name for name, df in frames.items() if not df.empty]
+        for name in sources:
+            self._write_frame(frames[name], os.path.join(tmp_dir, f"{name}.arrow"))
+        has_combined = combined is not None and not combined.empty
+        if has_combined:
+            self._write_frame(combined, os.path.join(tmp_dir, f"{COMBINED}.arrow"))
+        if previous is not None:
+            manifest = self.manifest(previous)
+            for name in manifest.get("sources", []):
+                if name not in sources:
+                    # Unchanged files are shared between versions rather than copied
+                    os.link(self._frame_path(previous, name), os.path.join(tmp_dir, f"{name}.arrow"))
+                    sources.append(name)
+            if not has_combined and manifest.get("combined"):
+                os.link(self._frame_path(previous, COMBINED), os.path.join(tmp_dir, f"{COMBINED}.arrow"))
+                has_combined = True
+
+        with open(os.path.join(tmp_dir, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump({"version": version, "sources": sources, "combined": has_combined}, f)
+        os.replace(tmp_dir, self._version_dir(version))
+
+        # Readers see either the old pointer or the new one, never a partial write
+        tmp_path = f"{self._current_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_path, self._current_path)
+        self._prune(version)
+        return version
+
+    def _write_frame(self, df: pd.DataFrame, path: str):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for i, field in enumerate(table.schema):
+            if pa.types.is_floating(field.type) and table.column(i).null_count:
+                # Keep NaN rather than nulls: pandas can view a float column with no
+                # nulls in place, but has to copy one to fill its nulls with NaN
+                values = pa.array(df.iloc[:, i].to_numpy(), type=field.type, from_pandas=False)
+                table = table.set_column(i, field, values)
+        # Uncompressed so readers can map the buffers instead of decoding them
+        with ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
+
+    def _prune(self, current: str):
+        versions = self.versions()
+        for version in versions[:max(0, len(versions) - self.keep)]:
+            if version != current:
+                # Workers still mapping these files keep them until they let go
+                shutil.rmtree(self._version_dir(version), ignore_errors=True)
+
+    def versions(self) -> List[str]:
+        """Published versions on disk, oldest first."""
+        if not os.path.isdir(self._versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self._versions_dir) if not name.startswith('.'))
+
+    def current_version(self) -> Optional[str]:
+        """The version readers should serve, or None before the first publish."""
+        try:
+            mtime = os.stat(self._current_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._pointer[0] == mtime:
+                return self._pointer[1]
+        with open(self._current_path, encoding='utf-8') as f:
+            version = f.read().strip() or None
+        with self._lock:
+            self._pointer = (mtime, version)
+        return version
+
+    def manifest(self, version: str) -> dict:
+        """Sources in a version; versions never change once published, so this is read once."""
+        manifest = self._manifests.get(version)
+        if manifest is None:
+            with open(os.path.join(self._version_dir(version), MANIFEST), encoding='utf-8') as f:
+                manifest = json.load(f)
+            self._manifests[version] = manifest
+        return manifest
+
+    def read_table(self, name: str, version: Optional[str] = None) -> Optional['pa.Table']:
+        """Map a source (or the combined table) from a version; nothing is parsed or copied."""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        path = self._frame_path(version, name)
+        if not os.path.exists(path):
+            return None
+        # Left open: the table's buffers are the mapping, and stay valid while anything uses them
+        return ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+    def read(self, name: str, version: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Read a source (or the combined table) from a version as a read-only frame over the mapped file."""
+        table = self.read_table(name, version)
+        return self._to_pandas(table) if table is not None else None
+
+    @staticmethod
+    def _to_pandas(table: 'pa.Table') -> pd.DataFrame:
+        # One block per column, so numeric columns are views of the mapping rather than
+        # a consolidated copy; string columns are Arrow-backed either way
+        return table.to_pandas(split_blocks=True)
+
+    def get(self, name: str) -> Tuple[Optional[str], Optional[pd.DataFrame]]:
+        """
+        Return (version, frame) for the current version, reading each file
+        once per process and version.
+        """
+        version = self.current_version()
+        if version is None:
+            return None, None
+        with self._lock:
+            memo = self._frames.get(name)
+        if memo is not None and memo[0] == version:
+            return memo[0], memo[1]
+        table = self.read_table(name, version)
+        df = self._to_pandas(table) if table is not None else None
+        with self._lock:
+            self._frames[name] = (version, df, table)
+        return version, df
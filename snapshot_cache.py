@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Snapshot Cache
+In-process, per-key snapshot cache with stale-while-revalidate refresh
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class Snapshot:
+    value: Any
+    fetched_at: float
+    version: int
+    # Seconds this snapshot is fresh, when it differs from the cache's TTL
+    ttl: Optional[float] = None
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class SnapshotCache:
+    def __init__(self, ttl: float = 900, max_stale: float = 86400):
+        """
+        Args:
+            ttl (float): Seconds a snapshot is served as fresh
+            max_stale (float): Seconds past the TTL a snapshot may still be
+                served while a background refresh runs
+        """
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._refreshing = set()
+        self._version = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def peek(self, key: str) -> Optional[Snapshot]:
+        """Return the current snapshot for a key without loading anything."""
+        with self._lock:
+            return self._snapshots.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> Snapshot:
+        """Publish a new snapshot for a key, fresh for ``ttl`` seconds (the cache's TTL by default)."""
+        with self._lock:
+            self._version += 1
+            snapshot = Snapshot(value, time.time(), self._version, ttl)
+            self._snapshots[key] = snapshot
+            return snapshot
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for a key, loading it on a miss.
+
+        Fresh snapshots are returned directly. Stale snapshots are returned
+        immediately while a single background thread reloads them. Missing
+        or expired snapshots are loaded synchronously, once per key even
+        under concurrent requests.
+        """
+        return self.get_snapshot(key, loader).value
+
+    def get_snapshot(self, key: str, loader: Callable[[], Any],
+                     ttl_for: Optional[Callable[[Any], Optional[float]]] = None) -> Snapshot:
+        """
+        Like get(), but return the snapshot so callers can key on its version.
+
+        ``ttl_for`` picks the TTL of each loaded value, so a value known to
+        be incomplete can go stale sooner and be reloaded in the background.
+        """
+        snapshot = self.peek(key)
+        if snapshot is not None:
+            age, ttl = snapshot.age(), self._ttl(snapshot)
+            if age < ttl:
+                self.hits += 1
+                return snapshot
+            if age < ttl + self.max_stale:
+                self.stale_hits += 1
+                self._refresh_in_background(key, loader, ttl_for)
+                return snapshot
+
+        with self._key_lock(key):
+            # Another request may have loaded it while we waited
+            snapshot = self.peek(key)
+            if snapshot is not None and snapshot.age() < self._ttl(snapshot):
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            return self._load(key, loader, ttl_for)
+
+    def _ttl(self, snapshot: Snapshot) -> float:
+        return self.ttl if snapshot.ttl is None else snapshot.ttl
+
+    def _load(self, key: str, loader: Callable[[], Any],
+              ttl_for: Optional[Callable[[Any], Optional[float]]]) -> Snapshot:
+        value = loader()
+        return self.set(key, value, ttl_for(value) if ttl_for is not None else None)
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Any],
+                               ttl_for: Optional[Callable[[Any], Optional[float]]] = None):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with self._key_lock(key):
+                    self._load(key, loader, ttl_for)
+            except Exception as e:
+                self.refresh_errors += 1
+                print(f"Error refreshing {key} snapshot: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"refresh-{key}", daemon=True).start()
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one snapshot, or all of them when no key is given."""
+        with self._lock:
+            if key is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the age of each snapshot."""
+        with self._lock:
+            ages = {key: round(s.age(), 1) for key, s in self._snapshots.items()}
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'refresh_errors': self.refresh_errors,
+            'ages': ages
+        }
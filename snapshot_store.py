@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Snapshot Store
+Append-only history of parsed rankings as Parquet, partitioned by source and date
+"""
+
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+FETCHED_AT = "Fetched At"
+
+
+class SnapshotStore:
+    def __init__(self, root: str = os.environ.get('RANKINGS_SNAPSHOT_DIR', 'results/snapshots')):
+        """
+        Args:
+            root (str): Directory holding source=<name>/date=<YYYY-MM-DD>/ partitions
+        """
+        if pa is None:
+            raise ImportError("The snapshot store requires the pyarrow package")
+        self.root = root
+        # Reads map files into memory instead of copying them through buffers
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+
+    def _source_dir(self, source: str) -> str:
+        return os.path.join(self.root, f"source={source}")
+
+    def append(self, source: str, df: pd.DataFrame, fetched_at: Optional[datetime] = None) -> str:
+        """
+        Write one parsed frame as a new snapshot file; existing files are never touched.
+
+        Returns:
+            str: Path of the written file
+        """
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        partition = os.path.join(self._source_dir(source), f"date={fetched_at:%Y-%m-%d}")
+        os.makedirs(partition, exist_ok=True)
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        stamp = pa.array([fetched_at] * len(df), type=pa.timestamp('us', tz='UTC'))
+        table = table.append_column(FETCHED_AT, stamp)
+
+        # Timestamp first so files sort chronologically; suffix keeps names unique
+        path = os.path.join(partition, f"{fetched_at:%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet")
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+        return path
+
+    def sources(self) -> List[str]:
+        """Names of every source with at least one snapshot."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name.split('=', 1)[1] for name in os.listdir(self.root) if name.startswith('source='))
+
+    def _dataset(self, source: str):
+        partitioning = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+        return ds.dataset(self._source_dir(source), format="parquet", partitioning=partitioning,
+                          filesystem=self._fs, exclude_invalid_files=True)
+
+    def read(self, source: str, columns: Optional[List[str]] = None, team: Optional[str] = None,
+             start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Read a source's history, loading only the requested columns.
+
+        Args:
+            source (str): Source name
+            columns (list): Columns to load; all when not given
+            team (str): Only rows for this team
+            start (str): First fetch date to include, YYYY-MM-DD
+            end (str): Last fetch date to include, YYYY-MM-DD
+
+        Returns:
+            DataFrame: Matching rows ordered by fetch time
+        """
+        if not os.path.isdir(self._source_dir(source)):
+            return pd.DataFrame(columns=columns or [])
+
+        condition = None
+        for expression in (
+            ds.field('Team') == team if team is not None else None,
+            ds.field('date') >= start if start is not None else None,
+            ds.field('date') <= end if end is not None else None,
+        ):
+            if expression is not None:
+                condition = expression if condition is None else condition & expression
+
+        projection = None
+        if columns is not None:
+            # Fetch time is always needed to order the history
+            projection = list(dict.fromkeys(list(columns) + [FETCHED_AT]))
+        table = self._dataset(source).to_table(columns=projection, filter=condition)
+        df = table.to_pandas().sort_values(FETCHED_AT, kind='stable').reset_index(drop=True)
+        if columns is not None:
+            df = df[list(columns)]
+        return df
+
+    def latest(self, source: str) -> Optional[pd.DataFrame]:
+        """Return the most recent snapshot of a source, or None if there is none."""
+        directory = self._source_dir(source)
+        if not os.path.isdir(directory):
+            return None
+        files = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(directory)
+            for name in names if name.endswith('.parquet')
+        ]
+        if not files:
+            return None
+        newest = max(files, key=lambda path: (os.path.basename(os.path.dirname(path)), os.path.basename(path)))
+        df = pq.read_table(newest, memory_map=True).to_pandas()
+        return df.drop(columns=[FETCHED_AT])
+
+    def team_history(self, team: str, source: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """How a team's row in one source changed across snapshots."""
+        if columns is not None:
+            columns = [FETCHED_AT] + [column for column in columns if column != FETCHED_AT]
+        return self.read(source, columns=columns, team=team)
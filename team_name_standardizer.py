@@ -5,8 +5,24 @@ Enhanced Team Name Standardizer
 Standardizes college basketball team names across different ranking sources
 """
 
+import os
+from typing import Iterable, Optional, Union
+import pandas as pd
+from alias_resolver import FuzzyAliasResolver
+
+# Accepted fuzzy resolutions are remembered here between runs
+DEFAULT_ALIAS_CACHE = os.environ.get('TEAM_ALIAS_CACHE', 'results/alias_cache.json')
+
+
 class EnhancedTeamNameStandardizer:
-    def __init__(self):
+    def __init__(self, fuzzy_threshold: Optional[float] = 0.8,
+                 alias_cache_path: Optional[str] = DEFAULT_ALIAS_CACHE):
+        """
+        Args:
+            fuzzy_threshold (float): Minimum similarity for resolving names
+                missing from the mappings, or None to use direct mappings only
+            alias_cache_path (str): On-disk memo of fuzzy resolutions
+        """
         # Core mappings for team names
         self.name_mappings = {
             "Abl Christian": "Abilene Christian",
@@ -788,19 +804,64 @@ class EnhancedTeamNameStandardizer:
         
         }
 
+        self.alias_resolver = None
+        if fuzzy_threshold is not None:
+            self.alias_resolver = FuzzyAliasResolver(
+                self.name_mappings, threshold=fuzzy_threshold, cache_path=alias_cache_path
+            )
+
     def clean_name(self, name: str) -> str:
         """
-        Clean and standardize a team name using only direct mappings.
+        Clean and standardize a team name.
+        
+        Direct mappings are tried first; names missing from them fall back
+        to fuzzy alias resolution when it is enabled.
         
         Args:
             name (str): The team name to clean
             
         Returns:
-            str: The standardized team name if found in mappings, otherwise original name
+            str: The standardized team name if found, otherwise original name
         """
         if not name:
             return name
             
         # Clean whitespace and check mappings
         cleaned = ' '.join(name.strip().split())
-        return self.name_mappings.get(cleaned, cleaned)
+        if cleaned in self.name_mappings:
+            return self.name_mappings[cleaned]
+        if self.alias_resolver is not None:
+            return self.alias_resolver.resolve(cleaned) or cleaned
+        return cleaned
+
+    def standardize_names(self, names: Union[pd.Series, Iterable[str]]) -> pd.Series:
+        """
+        Standardize a whole column of team names in one vectorized pass.
+
+        Names are deduplicated first, so each distinct raw name is cleaned
+        and looked up once no matter how many rows carry it.
+
+        Args:
+            names (Series or iterable): Raw team names; missing values pass through
+
+        Returns:
+            Series: Standardized names, aligned with the input index
+        """
+        series = names if isinstance(names, pd.Series) else pd.Series(list(names), dtype=object)
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+
+        # Same whitespace collapse and lookup as clean_name(), over distinct names only
+        cleaned = pd.Series(uniques, dtype=object).str.split().str.join(' ')
+        mapped = cleaned.map(self.name_mappings)
+        if self.alias_resolver is not None:
+            unmapped = cleaned[mapped.isna() & (cleaned != '')]
+            if not unmapped.empty:
+                present = mapped.dropna().unique()
+                mapped = mapped.fillna(unmapped.map(self.alias_resolver.resolve_many(unmapped, present)))
+        standardized = mapped.fillna(cleaned).to_numpy(dtype=object)
+
+        result = standardized.take(codes)
+        missing = codes == -1
+        if missing.any():
+            result[missing] = series.to_numpy(dtype=object)[missing]
+        return pd.Series(result, index=series.index, name=series.name, dtype=object)
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Keep fuzzy-match resolutions made by tests out of results/
+os.environ.setdefault('TEAM_ALIAS_CACHE', os.path.join(tempfile.mkdtemp(), 'alias_cache.json'))
@@ -0,0 +1,52 @@
+"""Fuzzy alias resolution must leave distinct teams with similar names apart."""
+
+from alias_resolver import FuzzyAliasResolver, qualifiers
+from team_name_standardizer import EnhancedTeamNameStandardizer
+
+ALIASES = {
+    "Saint Francis (PA)": "St. Francis",
+    "St. Francis (PA) Red Flash": "St. Francis",
+    "Saint Mary's (CA)": "Saint Mary's",
+    "Monmouth Hawks": "Monmouth",
+    "Texas A&M Aggies": "Texas A&M",
+    "Texas A&M-CC": "Texas A&M-CC",
+}
+
+
+def resolver(**kwargs) -> FuzzyAliasResolver:
+    return FuzzyAliasResolver(ALIASES, **kwargs)
+
+
+def test_qualifiers():
+    assert qualifiers("St. Francis-NY") == {"ny"}
+    assert qualifiers("Saint Joseph's-Pa.") == {"pa"}
+    assert qualifiers("Miami (FL)") == {"fl"}
+    assert qualifiers("Miami OH") == {"oh"}
+    assert qualifiers("Loyola-Chicago") == set()
+
+
+def test_conflicting_qualifier_is_never_resolved():
+    assert resolver().resolve("St. Francis-NY") is None
+    assert resolver().resolve("Saint Francis-Pa.") == "St. Francis"
+    # Sources abbreviate the same state differently
+    assert resolver().resolve("Saint Mary's-Cal.") == "Saint Mary's"
+    # Teams known by no qualifier accept any
+    assert resolver().resolve("Monmouth-NJ") == "Monmouth"
+
+
+def test_near_tie_is_left_unresolved():
+    # Scores about as well against Texas A&M as against Texas A&M-CC
+    assert resolver(threshold=0.5).resolve("Texas A&M-C") is None
+    assert resolver(threshold=0.5, margin=0).resolve("Texas A&M-C") is not None
+
+
+def test_team_already_in_frame_is_not_reused():
+    assert resolver().resolve_many(["Saint Francis-Pa."], present=["St. Francis"]) == {}
+    # Two names onto one team: neither is trusted
+    assert resolver().resolve_many(["Saint Francis-Pa.", "Saint Francis Pa"]) == {}
+
+
+def test_standardize_names_passes_the_frame(tmp_path):
+    standardizer = EnhancedTeamNameStandardizer(alias_cache_path=str(tmp_path / "aliases.json"))
+    names = standardizer.standardize_names(["St. Francis", "Saint Francis-Pa."])
+    assert list(names) == ["St. Francis", "Saint Francis-Pa."]
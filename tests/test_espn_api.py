@@ -0,0 +1,95 @@
+"""The ESPN data endpoint path, against a local server replaying the benchmark fixture."""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import fetch_policy
+from cassette import configure_cassette
+from http_session import HttpClient
+from main import BasketballRankingsParser
+from rate_limit import HostRateLimiter
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+PAGES = json.loads(fixture("espn_api.json"))
+
+
+class EndpointHandler(BaseHTTPRequestHandler):
+    # Set per test: serve the recorded pages, or fail every request
+    failing = False
+
+    def do_GET(self):
+        if self.failing:
+            self.send_error(404)
+            return
+        page = int(parse_qs(urlsplit(self.path).query).get('page', ['1'])[0])
+        body = json.dumps(PAGES[page - 1]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EndpointHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    EndpointHandler.failing = False
+
+
+@pytest.fixture
+def parser(endpoint, monkeypatch):
+    monkeypatch.setenv('ESPN_BPI_API_URL', f"http://127.0.0.1:{endpoint.server_port}/powerindex")
+    monkeypatch.setenv('ESPN_FETCH_MODE', 'api')
+    # Fresh breakers and no cassette, so earlier failures and RANKINGS_CASSETTE don't leak in
+    monkeypatch.setattr(fetch_policy, '_policies', {})
+    configure_cassette(None)
+    parser = BasketballRankingsParser()
+    parser.http = HttpClient(rate_limiter=HostRateLimiter({}, default_rate=1000, default_burst=1000))
+    yield parser
+    parser.http.close()
+
+
+def test_api_rankings_from_local_endpoint(parser):
+    df = parser.get_espn_rankings()
+
+    recorded = [team for page in PAGES for team in page['teams']]
+    assert list(df.columns) == ["Team", "BPI Rating", "BPI Rank"]
+    assert len(df) == len(recorded) == PAGES[0]['pagination']['count']
+    assert df['BPI Rank'].is_monotonic_increasing
+    assert sorted(df['BPI Rank']) == sorted(int(team['categories'][0]['totals'][1]) for team in recorded)
+
+
+def test_falls_back_to_browser_when_endpoint_fails(parser, monkeypatch):
+    EndpointHandler.failing = True
+    rendered = []
+
+    def fetch_page_source():
+        rendered.append(True)
+        return fixture("espn.html")
+
+    monkeypatch.setattr(parser, 'fetch_espn_page_source', fetch_page_source)
+    df = parser.get_espn_rankings()
+
+    assert rendered
+    assert list(df.columns) == ["Team", "BPI Rating", "BPI Rank"]
+    assert len(df) == PAGES[0]['pagination']['count']
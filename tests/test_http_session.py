@@ -0,0 +1,83 @@
+"""Conditional revalidation through the pooled client, against a local ETag/304 server."""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetch_policy
+import http_session
+import sagarin
+from cassette import configure_cassette
+from http_session import HttpClient
+from rate_limit import HostRateLimiter
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+ETAG = '"sagarin-1"'
+
+with open(os.path.join(FIXTURES, "sagarin.html"), "rb") as f:
+    PAGE = f.read()
+
+
+class RevalidatingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('ETag', ETAG)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RevalidatingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/cbsend.htm"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # A leaked connection now fails the test in seconds instead of hanging it
+    monkeypatch.setattr(http_session, 'POOL_TIMEOUT', 2)
+    monkeypatch.setattr(fetch_policy, '_policies', {})
+    configure_cassette(None)
+    client = HttpClient(pool_maxsize=2, rate_limiter=HostRateLimiter({}, default_rate=1000, default_burst=1000))
+    yield client
+    client.close()
+
+
+def test_streamed_revalidations_release_connections(server, client, monkeypatch):
+    monkeypatch.setattr(sagarin, 'get_session', lambda: client)
+    parser = sagarin.BasketballRankingsParser()
+
+    first = parser.parse_rankings(server)
+    assert first is not None
+    # More revalidations than the pool holds connections
+    for _ in range(6):
+        again = parser.parse_rankings(server)
+        assert again is not None
+        assert again.equals(first)
+
+
+def test_not_modified_returns_previous_body(server, client):
+    first = client.get(server, stream=True)
+    body = first.content
+    for _ in range(6):
+        response = client.get(server, stream=True)
+        assert response.not_modified
+        assert response.content == body
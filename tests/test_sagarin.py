@@ -0,0 +1,28 @@
+"""The streaming Sagarin parser against the benchmark fixture built from the stored page."""
+
+import os
+
+import pandas as pd
+
+from sagarin import BasketballRankingsParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def page_lines():
+    with open(os.path.join(ROOT, "benchmarks", "fixtures", "sagarin.html"), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_stop_early_reads_past_a_repeated_rank():
+    # The page lists a MEAC line at rank 29 just before Maryland, also rank 29
+    parsed = BasketballRankingsParser().parse_lines(page_lines(), stop_early=True)
+    stored = pd.read_csv(os.path.join(ROOT, "results", "sagarin.csv"))
+    assert parsed["Team"].tolist() == stored["Team"].tolist()
+    assert parsed["Rank"].tolist() == stored["Sagarin Rank"].tolist()
+
+
+def test_stop_early_matches_a_full_parse():
+    parser = BasketballRankingsParser()
+    pd.testing.assert_frame_equal(parser.parse_lines(page_lines(), stop_early=True),
+                                  parser.parse_lines(page_lines(), stop_early=False))
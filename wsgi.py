@@ -0,0 +1,14 @@
+"""
+WSGI entry point for production serving, e.g. ``gunicorn -c gunicorn.conf.py``.
+
+Workers serve the snapshot published by the pipeline to results/shared and
+never scrape; run main.py (or the refresh scheduler) to publish new versions.
+"""
+
+import os
+
+os.environ.setdefault('RANKINGS_SERVE_MODE', 'shared')
+
+from app import app  # noqa: E402
+
+application = app